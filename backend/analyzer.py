@@ -6,10 +6,15 @@ Falls back gracefully to OpenCV-only analysis if model download fails.
 
 import cv2
 import numpy as np
+import operator
 import os
-import urllib.request
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import urllib3
+
 # ── MediaPipe Tasks imports ──────────────────────────────────────────────────
 import mediapipe as mp
 from mediapipe.tasks import python as mp_python
@@ -30,69 +35,191 @@ POSE_MODEL_URL = (
 FACE_MODEL_PATH = MODELS_DIR / "face_landmarker.task"
 POSE_MODEL_PATH = MODELS_DIR / "pose_landmarker_lite.task"
 
+# The LBP cascade uses integer features and runs several times faster than
+# Haar; it isn't bundled with the OpenCV pip wheels, so it's fetched too —
+# pinned to a release tag, like the model URLs' version directories.
+LBP_CASCADE_URL = (
+    "https://raw.githubusercontent.com/opencv/opencv/4.10.0/"
+    "data/lbpcascades/lbpcascade_frontalface_improved.xml"
+)
+LBP_CASCADE_PATH = MODELS_DIR / "lbpcascade_frontalface_improved.xml"
+
+# One pool for all model fetches: keep-alive connections instead of a fresh
+# TCP+TLS handshake per file (urlretrieve sends Connection: close).
+_http_pool = urllib3.PoolManager(maxsize=4, timeout=urllib3.Timeout(connect=10, read=60))
+
 
 def _download_model(url: str, path: Path) -> bool:
-    """Download a mediapipe task model file if not already cached."""
+    """Download a model file if not already cached."""
     if path.exists():
         return True
+    partial = path.with_name(path.name + ".part")
     try:
         print(f"[CogniSync] Downloading model: {path.name} …")
-        urllib.request.urlretrieve(url, path)
+        resp = _http_pool.request("GET", url, preload_content=False)
+        try:
+            if resp.status != 200:
+                raise OSError(f"HTTP {resp.status}")
+            with open(partial, "wb") as f:
+                shutil.copyfileobj(resp, f)
+        finally:
+            resp.release_conn()
+        # Rename only once complete, so an interrupted fetch isn't cached
+        partial.replace(path)
         print(f"[CogniSync] ✓ Downloaded {path.name}")
         return True
     except Exception as e:
+        partial.unlink(missing_ok=True)
         print(f"[CogniSync] ✗ Failed to download {path.name}: {e}")
         return False
 
 
+def _download_models():
+    """Fetch every missing model file concurrently."""
+    downloads = (
+        (FACE_MODEL_URL, FACE_MODEL_PATH),
+        (POSE_MODEL_URL, POSE_MODEL_PATH),
+        (LBP_CASCADE_URL, LBP_CASCADE_PATH),
+    )
+    with ThreadPoolExecutor(max_workers=len(downloads)) as pool:
+        list(pool.map(lambda item: _download_model(*item), downloads))
+
+
 # ── Initialize detectors ─────────────────────────────────────────────────────
 _face_detector = None
 _pose_detector = None
 MEDIAPIPE_TASKS_READY = False
 
-def _init_detectors():
-    global _face_detector, _pose_detector, MEDIAPIPE_TASKS_READY
+# TFLite delegate: "cpu" (XNNPACK, default) or "gpu". Downgraded to "cpu"
+# the first time a GPU landmarker fails to build, so sessions don't retry it.
+_delegate = os.getenv("COGNISYNC_DELEGATE", "cpu").strip().lower()
+
+
+def _base_options(model_path: Path, delegate: str):
+    if delegate == "gpu":
+        return mp_python.BaseOptions(
+            model_asset_path=str(model_path),
+            delegate=mp_python.BaseOptions.Delegate.GPU,
+        )
+    return mp_python.BaseOptions(model_asset_path=str(model_path))
+
 
-    face_ok = _download_model(FACE_MODEL_URL, FACE_MODEL_PATH)
-    pose_ok = _download_model(POSE_MODEL_URL, POSE_MODEL_PATH)
+def _create_landmarker(name: str, landmarker_cls, model_path: Path, make_options):
+    """Create a landmarker on the configured delegate, falling back to CPU."""
+    global _delegate
 
-    if face_ok:
+    if _delegate == "gpu":
         try:
-            face_opts = mp_vision.FaceLandmarkerOptions(
-                base_options=mp_python.BaseOptions(
-                    model_asset_path=str(FACE_MODEL_PATH)
-                ),
-                running_mode=mp_vision.RunningMode.IMAGE,
+            return landmarker_cls.create_from_options(
+                make_options(_base_options(model_path, "gpu"))
+            )
+        except Exception as e:
+            print(f"[CogniSync] {name} GPU delegate unavailable, using CPU: {e}")
+            _delegate = "cpu"
+
+    try:
+        return landmarker_cls.create_from_options(
+            make_options(_base_options(model_path, "cpu"))
+        )
+    except Exception as e:
+        print(f"[CogniSync] {name} init failed: {e}")
+        return None
+
+
+def _create_detectors(running_mode) -> tuple:
+    """Build a (face, pose) landmarker pair for the given running mode."""
+    face_detector = None
+    pose_detector = None
+
+    if FACE_MODEL_PATH.exists():
+        face_detector = _create_landmarker(
+            "FaceLandmarker",
+            mp_vision.FaceLandmarker,
+            FACE_MODEL_PATH,
+            lambda base_options: mp_vision.FaceLandmarkerOptions(
+                base_options=base_options,
+                running_mode=running_mode,
                 num_faces=1,
                 min_face_detection_confidence=0.5,
                 min_face_presence_confidence=0.5,
                 min_tracking_confidence=0.5,
                 output_face_blendshapes=True,
-            )
-            _face_detector = mp_vision.FaceLandmarker.create_from_options(face_opts)
-        except Exception as e:
-            print(f"[CogniSync] FaceLandmarker init failed: {e}")
+            ),
+        )
 
-    if pose_ok:
-        try:
-            pose_opts = mp_vision.PoseLandmarkerOptions(
-                base_options=mp_python.BaseOptions(
-                    model_asset_path=str(POSE_MODEL_PATH)
-                ),
-                running_mode=mp_vision.RunningMode.IMAGE,
+    if POSE_MODEL_PATH.exists():
+        pose_detector = _create_landmarker(
+            "PoseLandmarker",
+            mp_vision.PoseLandmarker,
+            POSE_MODEL_PATH,
+            lambda base_options: mp_vision.PoseLandmarkerOptions(
+                base_options=base_options,
+                running_mode=running_mode,
                 min_pose_detection_confidence=0.5,
                 min_pose_presence_confidence=0.5,
                 min_tracking_confidence=0.5,
-            )
-            _pose_detector = mp_vision.PoseLandmarker.create_from_options(pose_opts)
-        except Exception as e:
-            print(f"[CogniSync] PoseLandmarker init failed: {e}")
+            ),
+        )
+
+    return face_detector, pose_detector
+
+
+def _init_detectors():
+    global _face_detector, _pose_detector, MEDIAPIPE_TASKS_READY
+
+    _download_models()
+
+    # Stateless IMAGE-mode pair for callers without a session
+    _face_detector, _pose_detector = _create_detectors(mp_vision.RunningMode.IMAGE)
 
     MEDIAPIPE_TASKS_READY = _face_detector is not None
+    if MEDIAPIPE_TASKS_READY:
+        print(f"[CogniSync] MediaPipe landmarkers running on {_delegate.upper()} delegate")
 
 # Attempt initialization at import time
 _init_detectors()
 
+
+class VisionSession:
+    """
+    Per-client detector state.
+    VIDEO-mode landmarkers keep their tracker warm between frames, so the
+    face/pose detection stage only re-runs when tracking confidence drops and
+    most frames pay for landmark regression alone.
+    """
+
+    def __init__(self):
+        self.face_detector, self.pose_detector = _create_detectors(
+            mp_vision.RunningMode.VIDEO
+        )
+        self._t0 = time.monotonic()
+        self._last_ts = -1
+        self.prev_gray = None  # last downscaled gray frame, for motion estimation
+        self.rgb_buffer = None  # reused BGR/gray→RGB destination for MediaPipe input
+
+    def to_rgb(self, image):
+        """Convert into the session's RGB buffer, reallocating only on resize."""
+        shape = image.shape[:2] + (3,)
+        if self.rgb_buffer is None or self.rgb_buffer.shape != shape:
+            self.rgb_buffer = np.empty(shape, np.uint8)
+        return cv2.cvtColor(image, _rgb_code(image), dst=self.rgb_buffer)
+
+    def next_timestamp_ms(self) -> int:
+        """Monotonically increasing timestamp required by detect_for_video."""
+        ts = int((time.monotonic() - self._t0) * 1000)
+        if ts <= self._last_ts:
+            ts = self._last_ts + 1
+        self._last_ts = ts
+        return ts
+
+    def close(self):
+        for detector in (self.face_detector, self.pose_detector):
+            if detector is not None:
+                detector.close()
+        self.face_detector = None
+        self.pose_detector = None
+
+
 # Try optional DeepFace
 try:
     from deepface import DeepFace
@@ -100,41 +227,168 @@ try:
 except ImportError:
     DEEPFACE_AVAILABLE = False
 
-# OpenCV face cascade for fallback
-_cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-_face_cascade = cv2.CascadeClassifier(_cascade_path)
+# DeepFace.analyze re-runs its own face detector every call; when we already
+# have a crop, feed the emotion CNN directly. Built once at import.
+DEEPFACE_EMOTION_LABELS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+_emotion_model = None
+if DEEPFACE_AVAILABLE:
+    try:
+        from deepface.modules import modeling
+        try:
+            _emotion_model = modeling.build_model(task="facial_attribute", model_name="Emotion")
+        except TypeError:  # deepface < 0.0.94 signature
+            _emotion_model = modeling.build_model("Emotion")
+    except Exception as e:
+        print(f"[CogniSync] DeepFace emotion model preload failed: {e}")
+
+# Try optional PyTurboJPEG: decodes straight to a downscaled BGR frame
+# (scaling happens inside the IDCT), skipping most of the full-res decode
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_GRAY
+    _turbo_jpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except Exception:
+    TURBOJPEG_AVAILABLE = False
+
+# Frames at least this wide are decoded at half resolution; the landmark
+# models and OpenCV heuristics don't need more than ~640px of width.
+HALF_DECODE_MIN_WIDTH = 1280
+
+# Working width for the OpenCV heuristics (movement, Haar fallback)
+ANALYSIS_MAX_WIDTH = 640
+
+# Mean absolute gray-level difference between consecutive frames (0–255)
+MOVEMENT_STILL_MAX = 3.0
+MOVEMENT_MODERATE_MAX = 8.0
+
+# OpenCV face cascade for fallback: LBP when available, Haar as the backstop
+def _load_face_cascade():
+    """Return the face cascade, preferring LBP over Haar."""
+    if LBP_CASCADE_PATH.exists():
+        cascade = cv2.CascadeClassifier(str(LBP_CASCADE_PATH))
+        if not cascade.empty():
+            return cascade
+        print(f"[CogniSync] ✗ Could not load {LBP_CASCADE_PATH.name}, using Haar cascade")
+    _cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+    return cv2.CascadeClassifier(_cascade_path)
+
+
+_face_cascade = _load_face_cascade()
 
 
 # ── Public API ────────────────────────────────────────────────────────────────
 
-def analyze_frame(frame_bytes: bytes) -> dict:
+def analyze_frame(
+    frame_bytes: bytes,
+    session: "VisionSession | None" = None,
+    pixel_format: str = "bgr",
+) -> dict:
     """
     Analyze a single video frame.
+    Pass a VisionSession to reuse tracker state across a client's frames.
+    pixel_format="gray" decodes a grayscale JPEG as a single channel.
     Returns: {emotion, confidence, posture, attention, movement, head_tilt}
     """
-    nparr = np.frombuffer(frame_bytes, np.uint8)
-    bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    image, scale = decode_frame(frame_bytes, pixel_format)
+    return analyze_decoded(image, scale, session)
+
+
+def analyze_decoded(bgr, scale: float = 1.0, session: "VisionSession | None" = None) -> dict:
+    """
+    Analyze a frame already decoded by decode_frame.
+    Lets callers decode in parallel and keep detector calls on one thread.
+    `bgr` may also be a single-channel gray frame.
+    """
     if bgr is None:
         return _default_signals()
 
     h, w = bgr.shape[:2]
 
-    # Movement estimation (Laplacian variance)
-    movement = _estimate_movement(bgr)
+    # Downscale + grayscale once; shared by the OpenCV heuristics below
+    small = _downscale(bgr)
+    gray = small if small.ndim == 2 else cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    # Movement estimation (frame-to-frame difference)
+    movement = _estimate_movement(gray, session)
 
     if MEDIAPIPE_TASKS_READY:
-        return _analyze_with_mediapipe_tasks(bgr, h, w, movement)
+        # Landmarks are normalized; scale geometry back to the source frame
+        # so the pixel thresholds in the heuristics keep their meaning.
+        return _analyze_with_mediapipe_tasks(
+            bgr, round(h / scale), round(w / scale), movement, session
+        )
     else:
-        return _analyze_fallback(bgr, h, w, movement)
+        return _analyze_fallback(bgr, gray, h, w, movement, scale)
+
+
+def _downscale(bgr):
+    """Shrink the frame to ANALYSIS_MAX_WIDTH (no-op if already narrower)."""
+    w = bgr.shape[1]
+    if w <= ANALYSIS_MAX_WIDTH:
+        return bgr
+    f = ANALYSIS_MAX_WIDTH / w
+    return cv2.resize(bgr, (0, 0), fx=f, fy=f, interpolation=cv2.INTER_AREA)
 
 
-def _analyze_with_mediapipe_tasks(bgr, h, w, movement) -> dict:
+def decode_frame(frame_bytes: bytes, pixel_format: str = "bgr") -> tuple:
+    """
+    Decode a JPEG frame to BGR, or to a single gray channel if
+    pixel_format="gray".
+    Returns (image, scale) where scale is decoded size / source size,
+    or (None, 1.0) if the bytes can't be decoded.
+    """
+    gray = pixel_format == "gray"
+    if TURBOJPEG_AVAILABLE:
+        tj_format = TJPF_GRAY if gray else TJPF_BGR
+        try:
+            width, _, _, _ = _turbo_jpeg.decode_header(frame_bytes)
+            if width >= HALF_DECODE_MIN_WIDTH:
+                image = _turbo_jpeg.decode(
+                    frame_bytes, pixel_format=tj_format, scaling_factor=(1, 2)
+                )
+                scale = 0.5
+            else:
+                image = _turbo_jpeg.decode(frame_bytes, pixel_format=tj_format)
+                scale = 1.0
+            # PyTurboJPEG keeps a trailing channel axis for gray output
+            return (image[:, :, 0] if gray else image), scale
+        except Exception:
+            pass  # not a JPEG libjpeg-turbo accepts — let OpenCV try
+
+    if not frame_bytes:
+        return None, 1.0
+    nparr = np.frombuffer(frame_bytes, np.uint8)
+    try:
+        flags = cv2.IMREAD_GRAYSCALE if gray else cv2.IMREAD_COLOR
+        return cv2.imdecode(nparr, flags), 1.0
+    except cv2.error:
+        return None, 1.0
+
+
+def _rgb_code(image) -> int:
+    """cvtColor code taking a BGR or single-channel gray frame to RGB."""
+    return cv2.COLOR_GRAY2RGB if image.ndim == 2 else cv2.COLOR_BGR2RGB
+
+
+def _analyze_with_mediapipe_tasks(bgr, h, w, movement, session=None) -> dict:
     """Full analysis using mediapipe Tasks API."""
-    rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+    if session is not None:
+        rgb = session.to_rgb(bgr)
+    else:
+        rgb = cv2.cvtColor(bgr, _rgb_code(bgr))
+    # The landmark models take 3-channel input only (GRAY8 fails in the pose
+    # graph), so gray frames are expanded here rather than at decode time.
     mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
 
+    if session is not None and session.face_detector is not None:
+        face_detector, pose_detector = session.face_detector, session.pose_detector
+        ts = session.next_timestamp_ms()
+    else:
+        face_detector, pose_detector = _face_detector, _pose_detector
+        ts = None
+
     # Face landmarks
-    face_result = _face_detector.detect(mp_image)
+    face_result = _detect(face_detector, mp_image, ts)
     attention = "low"
     head_tilt = "unknown"
     emotion = "neutral"
@@ -159,8 +413,8 @@ def _analyze_with_mediapipe_tasks(bgr, h, w, movement) -> dict:
 
     # Pose
     posture = "neutral"
-    if _pose_detector:
-        pose_result = _pose_detector.detect(mp_image)
+    if pose_detector:
+        pose_result = _detect(pose_detector, mp_image, ts)
         if pose_result.pose_landmarks:
             posture = _compute_posture_from_landmarks(pose_result.pose_landmarks[0], h)
 
@@ -174,18 +428,26 @@ def _analyze_with_mediapipe_tasks(bgr, h, w, movement) -> dict:
     }
 
 
-def _analyze_fallback(bgr, h, w, movement) -> dict:
-    """OpenCV-only analysis when mediapipe models aren't available."""
+def _analyze_fallback(bgr, gray, h, w, movement, scale: float = 1.0) -> dict:
+    """
+    OpenCV-only analysis when mediapipe models aren't available.
+    `gray` is the downscaled grayscale frame; detections are mapped back to `bgr`.
+    `scale` is decoded size / source size (see decode_frame).
+    """
     emotion = "neutral"
     emo_confidence = 50.0
     attention = "medium"
     head_tilt = "centered"
 
-    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-    faces = _face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(60, 60))
+    # Only the face center/width is used, so detect at half the working
+    # resolution: a quarter of the pixels through the cascade pyramid.
+    det = cv2.resize(gray, (0, 0), fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+    up = w / det.shape[1]  # det pixels -> decoded pixels
+    min_face = max(1, round(60 * scale / up))  # 60 source pixels
+    faces = _face_cascade.detectMultiScale(det, 1.2, 4, minSize=(min_face, min_face))
 
     if len(faces) > 0:
-        x, y, fw, fh = faces[0]
+        x, y, fw, fh = (int(round(v * up)) for v in faces[0])
         # Face position as proxy for attention
         cx = x + fw / 2
         frame_cx = w / 2
@@ -201,7 +463,7 @@ def _analyze_fallback(bgr, h, w, movement) -> dict:
             head_tilt = "looking_away"
 
         if DEEPFACE_AVAILABLE:
-            emotion, emo_confidence = _deepface_emotion(bgr)
+            emotion, emo_confidence = _deepface_emotion(bgr, (x, y, fw, fh))
         else:
             emotion, emo_confidence = _opencv_heuristic_emotion(bgr, x, y, fw, fh)
 
@@ -217,24 +479,34 @@ def _analyze_fallback(bgr, h, w, movement) -> dict:
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
+def _detect(detector, mp_image, ts):
+    """Run IMAGE-mode detect, or VIDEO-mode detect_for_video when a timestamp is given."""
+    if ts is None:
+        return detector.detect(mp_image)
+    return detector.detect_for_video(mp_image, ts)
+
+
+# Landmark gathers, built once: each pulls its landmarks out of the result list
+# in a single C call. For a handful of points this plus float math is several
+# times cheaper than packing them into a NumPy array and doing scalar ops on it.
+_ATTN_LANDMARKS = operator.itemgetter(1, 33, 263, 152, 10)  # nose, eyes, chin, forehead
+_EMO_LANDMARKS = operator.itemgetter(61, 291, 13, 14, 105, 159, 234, 454)
+_POSE_LANDMARKS = operator.itemgetter(0, 11, 12, 23, 24)  # nose, shoulders, hips
+
+
 def _compute_attention_from_landmarks(landmarks, w, h) -> tuple:
     """Compute yaw/pitch from face landmarks list."""
-    def pt(idx):
-        lm = landmarks[idx]
-        return np.array([lm.x * w, lm.y * h, lm.z * w])
+    nose, left_eye, right_eye, chin, forehead = _ATTN_LANDMARKS(landmarks)
 
-    nose = pt(1)
-    left_eye = pt(33)
-    right_eye = pt(263)
-    chin = pt(152)
+    nose_x, left_x, right_x = nose.x * w, left_eye.x * w, right_eye.x * w
+    nose_y, chin_y, forehead_y = nose.y * h, chin.y * h, forehead.y * h
 
-    eye_mid_x = (left_eye[0] + right_eye[0]) / 2
-    face_width = abs(right_eye[0] - left_eye[0]) or 1
-    yaw_ratio = abs(nose[0] - eye_mid_x) / face_width
+    eye_mid_x = (left_x + right_x) / 2
+    face_width = abs(right_x - left_x) or 1
+    yaw_ratio = abs(nose_x - eye_mid_x) / face_width
 
-    forehead = pt(10)
-    face_height = abs(forehead[1] - chin[1]) or 1
-    pitch_ratio = (nose[1] - forehead[1]) / face_height
+    face_height = abs(forehead_y - chin_y) or 1
+    pitch_ratio = (nose_y - forehead_y) / face_height
 
     if yaw_ratio < 0.15 and 0.3 < pitch_ratio < 0.7:
         return "high", "centered"
@@ -244,29 +516,53 @@ def _compute_attention_from_landmarks(landmarks, w, h) -> tuple:
         return "low", "looking_away"
 
 
+# Blendshapes read by _emotion_from_blendshapes, in gather order
+_BS_NAMES = (
+    "mouthSmileLeft", "mouthSmileRight",
+    "browDownLeft", "browDownRight",
+    "browInnerUp", "jawOpen",
+    "mouthFrownLeft", "mouthFrownRight",
+    "eyeWideLeft",
+)
+# Positions of _BS_NAMES in the landmarker's blendshape list. MediaPipe emits
+# the categories in a fixed order, so this is built once from the first result;
+# names it doesn't emit point at a trailing zero slot.
+_bs_take = None
+_bs_count = 0
+
+
+def _blendshape_scores(blendshapes) -> list:
+    """Gather the _BS_NAMES scores from a blendshape list in one NumPy take."""
+    global _bs_take, _bs_count
+
+    n = len(blendshapes)
+    if _bs_take is None or n != _bs_count:
+        index = {bs.category_name: i for i, bs in enumerate(blendshapes)}
+        _bs_take = np.array([index.get(name, n) for name in _BS_NAMES], dtype=np.intp)
+        _bs_count = n
+
+    scores = np.zeros(n + 1, dtype=np.float32)
+    scores[:n] = np.fromiter((bs.score for bs in blendshapes), dtype=np.float32, count=n)
+    return scores[_bs_take].tolist()
+
+
 def _emotion_from_blendshapes(blendshapes) -> tuple:
     """
     Estimate emotion from MediaPipe face blendshapes.
     Blendshapes include mouthSmile, eyeSquint, browDown, etc.
     """
-    scores = {bs.category_name: bs.score for bs in blendshapes}
+    (
+        mouth_smile_l, mouth_smile_r,
+        brow_down_l, brow_down_r,
+        brow_inner, mouth_open,
+        mouth_frown_l, mouth_frown_r,
+        eye_wide,
+    ) = _blendshape_scores(blendshapes)
 
-    mouth_smile_l = scores.get("mouthSmileLeft", 0)
-    mouth_smile_r = scores.get("mouthSmileRight", 0)
     smile = (mouth_smile_l + mouth_smile_r) / 2
-
-    brow_down_l = scores.get("browDownLeft", 0)
-    brow_down_r = scores.get("browDownRight", 0)
     brow_down = (brow_down_l + brow_down_r) / 2
-
-    brow_inner = scores.get("browInnerUp", 0)
-    mouth_open = scores.get("jawOpen", 0)
-    mouth_frown_l = scores.get("mouthFrownLeft", 0)
-    mouth_frown_r = scores.get("mouthFrownRight", 0)
     frown = (mouth_frown_l + mouth_frown_r) / 2
 
-    eye_wide = scores.get("eyeWideLeft", 0)
-
     if smile > 0.4:
         return "happy", min(100, smile * 130)
     elif mouth_open > 0.5 and eye_wide > 0.3:
@@ -285,22 +581,16 @@ def _emotion_from_blendshapes(blendshapes) -> tuple:
 
 def _heuristic_emotion_from_landmarks(landmarks, w, h) -> tuple:
     """Geometry-based emotion fallback from face landmarks."""
-    def pt(idx):
-        lm = landmarks[idx]
-        return (lm.x * w, lm.y * h)
-
-    left_corner = pt(61)
-    right_corner = pt(291)
-    upper_lip = pt(13)
-    lower_lip = pt(14)
-    left_brow = pt(105)
-    left_eye = pt(159)
-
-    mouth_width = abs(right_corner[0] - left_corner[0])
-    face_w = abs(pt(234)[0] - pt(454)[0]) or 1
+    (
+        left_corner, right_corner, upper_lip, lower_lip,
+        left_brow, left_eye, face_left, face_right,
+    ) = _EMO_LANDMARKS(landmarks)
+
+    mouth_width = abs(right_corner.x - left_corner.x) * w
+    face_w = abs(face_left.x - face_right.x) * w or 1
     smile_ratio = mouth_width / face_w
-    mouth_open = abs(lower_lip[1] - upper_lip[1])
-    brow_raise = abs(left_brow[1] - left_eye[1])
+    mouth_open = abs(lower_lip.y - upper_lip.y) * h
+    brow_raise = abs(left_brow.y - left_eye.y) * h
 
     if mouth_open > 15 and brow_raise > 10:
         return "surprised", 65.0
@@ -311,8 +601,26 @@ def _heuristic_emotion_from_landmarks(landmarks, w, h) -> tuple:
     return "neutral", 52.0
 
 
-def _deepface_emotion(bgr) -> tuple:
+def _deepface_emotion(bgr, box=None) -> tuple:
+    """
+    DeepFace emotion for a face box (x, y, w, h), or the whole frame if None.
+    A known box goes straight to the preloaded CNN; without one (or if preload
+    failed) DeepFace.analyze has to find the face first.
+    """
+    if _emotion_model is not None and box is not None:
+        try:
+            x, y, fw, fh = box
+            bgr = bgr[y:y+fh, x:x+fw]
+            gray = bgr if bgr.ndim == 2 else cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+            face = cv2.resize(gray, (48, 48)).astype(np.float32) / 255.0
+            probs = _emotion_model.model.predict(face[None, :, :, None], verbose=0)[0]
+            i = int(np.argmax(probs))
+            return DEEPFACE_EMOTION_LABELS[i], float(100 * probs[i] / probs.sum())
+        except Exception:
+            pass
     try:
+        if bgr.ndim == 2:
+            bgr = cv2.cvtColor(bgr, cv2.COLOR_GRAY2BGR)
         result = DeepFace.analyze(
             bgr, actions=["emotion"], enforce_detection=False, silent=True
         )
@@ -327,26 +635,14 @@ def _deepface_emotion(bgr) -> tuple:
 
 def _compute_posture_from_landmarks(landmarks, h) -> str:
     """Classify posture from pose landmarks."""
-    def y(idx):
-        return landmarks[idx].y * h
-
-    def x(idx):
-        return landmarks[idx].x
-
-    # PoseLandmark indices in mediapipe tasks
-    LEFT_SHOULDER = 11
-    RIGHT_SHOULDER = 12
-    LEFT_HIP = 23
-    RIGHT_HIP = 24
-    NOSE = 0
-
-    left_sh_y = y(LEFT_SHOULDER)
-    right_sh_y = y(RIGHT_SHOULDER)
-    hip_mid_y = (y(LEFT_HIP) + y(RIGHT_HIP)) / 2
-    sh_mid_y = (left_sh_y + right_sh_y) / 2
-    sh_diff = abs(landmarks[LEFT_SHOULDER].y - landmarks[RIGHT_SHOULDER].y)
-    nose_x = x(NOSE)
-    sh_mid_x = (x(LEFT_SHOULDER) + x(RIGHT_SHOULDER)) / 2
+    # PoseLandmark indices in mediapipe tasks: nose, shoulders, hips (normalized)
+    nose, left_sh, right_sh, left_hip, right_hip = _POSE_LANDMARKS(landmarks)
+
+    hip_mid_y = (left_hip.y + right_hip.y) * h / 2
+    sh_mid_y = (left_sh.y + right_sh.y) * h / 2
+    sh_diff = abs(left_sh.y - right_sh.y)
+    nose_x = nose.x
+    sh_mid_x = (left_sh.x + right_sh.x) / 2
 
     if sh_diff < 0.04 and sh_mid_y < hip_mid_y - 0.15:
         return "upright"
@@ -362,9 +658,13 @@ def _opencv_heuristic_emotion(bgr, x, y, fw, fh) -> tuple:
     face_roi = bgr[y:y+fh, x:x+fw]
     if face_roi.size == 0:
         return "neutral", 50.0
-    hsv = cv2.cvtColor(face_roi, cv2.COLOR_BGR2HSV)
-    mean_sat = hsv[:, :, 1].mean()
-    mean_val = hsv[:, :, 2].mean()
+    if face_roi.ndim == 2:
+        # Gray input carries no saturation; brightness is the HSV value
+        mean_sat, mean_val = 0.0, cv2.mean(face_roi)[0]
+    else:
+        hsv = cv2.cvtColor(face_roi, cv2.COLOR_BGR2HSV)
+        # One sweep for all channel means instead of two strided NumPy reductions
+        _, mean_sat, mean_val, _ = cv2.mean(hsv)
     if mean_sat > 80 and mean_val > 140:
         return "happy", 62.0
     elif mean_val < 90:
@@ -372,13 +672,23 @@ def _opencv_heuristic_emotion(bgr, x, y, fw, fh) -> tuple:
     return "neutral", 52.0
 
 
-def _estimate_movement(bgr) -> str:
-    """Estimate motion via Laplacian sharpness variance."""
-    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-    var = cv2.Laplacian(gray, cv2.CV_64F).var()
-    if var > 200:
+def _estimate_movement(gray, session=None) -> str:
+    """
+    Estimate motion as the mean absolute difference from the session's
+    previous gray frame. The first frame of a session (or a resolution
+    change) has nothing to compare against and reports "moderate".
+    """
+    prev = session.prev_gray if session is not None else None
+    if session is not None:
+        session.prev_gray = gray
+
+    if prev is None or prev.shape != gray.shape:
+        return "moderate"
+
+    score = cv2.mean(cv2.absdiff(prev, gray))[0]
+    if score < MOVEMENT_STILL_MAX:
         return "still"
-    elif var > 80:
+    elif score < MOVEMENT_MODERATE_MAX:
         return "moderate"
     return "restless"
 
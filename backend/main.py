@@ -1,21 +1,243 @@
 import os
 import base64
+import json
 import asyncio
 import time
 import subprocess
 import sys
-from fastapi import FastAPI, HTTPException
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 import uvicorn
-from analyzer import analyze_frame, analyze_audio_features
-from reasoning import get_agent_advice
+from analyzer import analyze_decoded, analyze_audio_features, decode_frame, VisionSession
+import reasoning
+from reasoning import RotationState, bucketize, get_agent_advice, use_rotation_state
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="CogniSync API", version="1.0.0")
+# ── Frame micro-batching ──────────────────────────────────────────────────────
+# Frames arriving within BATCH_WINDOW_S of each other are coalesced: decoded in
+# parallel, then run through the detectors back-to-back in one worker-thread
+# hop, which keeps the landmarkers warm and amortizes the thread handoff.
+BATCH_WINDOW_S = 0.010
+BATCH_MAX = 8
+
+# MediaPipe graphs aren't thread-safe, so every detector call runs on one
+# dedicated thread; JPEG decode runs on a general worker pool.
+_mp_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cognisync-mp")
+_worker_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 4, thread_name_prefix="cognisync-worker"
+)
+
+_frame_queue: Optional[asyncio.Queue] = None
+
+
+async def submit_frame(
+    frame_bytes: bytes, session: VisionSession, pixel_format: str = "bgr"
+) -> dict:
+    """Queue a frame for the batcher and wait for its vision signals."""
+    future = asyncio.get_running_loop().create_future()
+    await _frame_queue.put((frame_bytes, pixel_format, session, future))
+    return await future
+
+
+def _analyze_batch(decoded: list, sessions: list) -> list:
+    """Run detection for a batch sequentially; errors are returned per frame."""
+    results = []
+    for frame, session in zip(decoded, sessions):
+        if isinstance(frame, Exception):
+            results.append(frame)
+            continue
+        try:
+            bgr, scale = frame
+            results.append(analyze_decoded(bgr, scale, session))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+async def _frame_batcher():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _frame_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_S
+        while len(batch) < BATCH_MAX:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_frame_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            decoded = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        _worker_executor, decode_frame, frame_bytes, pixel_format
+                    )
+                    for frame_bytes, pixel_format, _, _ in batch
+                ),
+                return_exceptions=True,
+            )
+            results = await loop.run_in_executor(
+                _mp_executor, _analyze_batch, decoded, [session for _, _, session, _ in batch]
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, _, _, future), result in zip(batch, results):
+            if future.done():  # request was cancelled while queued
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# ── Per-client sessions ───────────────────────────────────────────────────────
+# Keyed by the X-Session-Id header; clients without one share "default".
+# The header is client-controlled, so at most MAX_SESSIONS are kept: creating
+# one more evicts the least recently used idle session.
+SESSION_TTL_S = 300
+SESSION_REAP_INTERVAL_S = 60
+MAX_SESSIONS = int(os.getenv("COGNISYNC_MAX_SESSIONS", "64"))
+
+
+ALERT_WINDOW = 3  # trailing states detect_alerts averages over
+
+
+class StateHistory:
+    """
+    Bounded history of analysis states.
+    Keeps running engagement/stress sums over the trailing ALERT_WINDOW states
+    so detect_alerts reads its averages in O(1) instead of re-summing.
+    """
+
+    __slots__ = ("_states", "_eng_sum", "_stress_sum")
+
+    def __init__(self, maxlen: int = 5):
+        assert maxlen > ALERT_WINDOW
+        self._states: deque[dict] = deque(maxlen=maxlen)
+        self._eng_sum = 0.0
+        self._stress_sum = 0.0
+
+    def append(self, state: dict) -> None:
+        self._states.append(state)
+        self._eng_sum += state["engagement_score"]
+        self._stress_sum += state["stress_score"]
+        if len(self._states) > ALERT_WINDOW:
+            leaving = self._states[-ALERT_WINDOW - 1]
+            self._eng_sum -= leaving["engagement_score"]
+            self._stress_sum -= leaving["stress_score"]
+
+    def window_means(self) -> tuple[float, float]:
+        """Mean (engagement, stress) over the trailing ALERT_WINDOW states."""
+        n = min(len(self._states), ALERT_WINDOW)
+        return self._eng_sum / n, self._stress_sum / n
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __iter__(self):
+        return iter(self._states)
+
+
+class SessionState:
+    """State shared by one client's frames: tracker state and short-term memory."""
+
+    def __init__(self, vision: VisionSession):
+        self.vision = vision
+        self.memory = StateHistory(maxlen=5)  # last 5 analysis states
+        self.rotation = RotationState()  # fallback advice rotation, per client
+        self.lock = asyncio.Lock()  # orders this client's frames through memory
+        self.last_seen = time.monotonic()
+
+
+_sessions: "OrderedDict[str, SessionState]" = OrderedDict()  # LRU order
+_sessions_lock = threading.Lock()
+
+
+async def get_session(session_id: str) -> SessionState:
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is not None:
+            _sessions.move_to_end(session_id)
+            session.last_seen = time.monotonic()
+            return session
+
+    # Building the landmarkers takes ~100 ms: do it on the MediaPipe thread,
+    # off the event loop and outside the lock.
+    vision = await asyncio.get_running_loop().run_in_executor(_mp_executor, VisionSession)
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            session = _sessions[session_id] = SessionState(vision)
+            vision = None
+            evicted = _evict_sessions(keep=session_id)
+        else:  # another request for this id got there first
+            _sessions.move_to_end(session_id)
+            evicted = []
+        session.last_seen = time.monotonic()
+    if vision is not None:
+        evicted.append(vision)
+    for unused in evicted:
+        unused.close()
+    return session
+
+
+def _evict_sessions(keep: str) -> list[VisionSession]:
+    """Drop least recently used idle sessions beyond MAX_SESSIONS, never `keep` (lock held)."""
+    excess = len(_sessions) - MAX_SESSIONS
+    if excess <= 0:
+        return []
+    idle = [
+        sid for sid, session in _sessions.items()
+        if sid != keep and not session.lock.locked()
+    ]
+    return [_sessions.pop(sid).vision for sid in idle[:excess]]
+
+
+def _expire_sessions(now: float) -> None:
+    with _sessions_lock:
+        expired = [
+            sid for sid, session in _sessions.items()
+            if now - session.last_seen > SESSION_TTL_S and not session.lock.locked()
+        ]
+        closing = [_sessions.pop(sid) for sid in expired]
+    for session in closing:
+        session.vision.close()
+
+
+async def _session_reaper():
+    while True:
+        await asyncio.sleep(SESSION_REAP_INTERVAL_S)
+        _expire_sessions(time.monotonic())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _frame_queue
+    _frame_queue = asyncio.Queue()
+    batcher = asyncio.create_task(_frame_batcher())
+    reaper = asyncio.create_task(_session_reaper())
+    yield
+    batcher.cancel()
+    reaper.cancel()
+    _mp_executor.shutdown(wait=True)
+    _expire_sessions(float("inf"))
+    _worker_executor.shutdown(wait=False)
+    await reasoning.aclose()
+
+
+app = FastAPI(title="CogniSync API", version="1.0.0", lifespan=lifespan)
 
 # CORS: allow the frontend origin (env var for production, localhost for dev)
 frontend_url = os.getenv("FRONTEND_URL", "")
@@ -35,12 +257,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Short-term memory: last 5 analysis states
-state_memory: list[dict] = []
-
 class AnalyzeRequest(BaseModel):
     frame_base64: str          # base64-encoded JPEG frame
     audio_features: Optional[dict] = None  # {speech_speed, pauses, tone_indicator}
+    # "gray": the client sent a grayscale JPEG (e.g. cv2.imencode(".jpg", gray)).
+    # It drops the chroma planes from the upload and is decoded as one channel,
+    # skipping the BGR→gray conversion on the server.
+    pixel_format: Literal["bgr", "gray"] = "bgr"
 
 class AnalyzeResponse(BaseModel):
     emotion: str
@@ -54,6 +277,57 @@ class AnalyzeResponse(BaseModel):
     alerts: list[str]
     processing_time_ms: float
 
+# ── Score tables: signal value → (engagement, stress, confidence) ────────────
+# One fused row per signal value, so scoring is one lookup per signal
+# instead of one per (signal, score) pair.
+_BASE_SCORES = (50.0, 20.0, 50.0)
+_NO_EFFECT = (0.0, 0.0, 0.0)
+
+_EMOTION_WEIGHTS = {
+    "happy":     (15.0, -10.0, 15.0),
+    "surprised": (10.0, 15.0, -5.0),
+    "neutral":   (0.0, 5.0, 5.0),
+    "sad":       (-10.0, 20.0, -15.0),
+    "angry":     (-5.0, 35.0, -10.0),
+    "disgusted": (-15.0, 25.0, -10.0),
+    "fearful":   (-10.0, 40.0, -25.0),
+}
+# Confidence takes half of the attention contribution to engagement
+_ATTENTION_WEIGHTS = {
+    "high":   (30.0, 0.0, 15.0),
+    "medium": (10.0, 0.0, 5.0),
+    "low":    (-20.0, 0.0, -10.0),
+}
+_POSTURE_WEIGHTS = {
+    "upright":         (10.0, 0.0, 20.0),
+    "leaning_forward": (15.0, 0.0, 15.0),
+    "neutral":         (0.0, 0.0, 0.0),
+    "slouched":        (-15.0, 0.0, -20.0),
+}
+_MOVEMENT_WEIGHTS = {
+    "restless": (0.0, 20.0, 0.0),
+    "moderate": (0.0, 5.0, 0.0),
+    "still":    (0.0, -5.0, 0.0),
+}
+_SPEECH_WEIGHTS = {
+    "fast":   (-5.0, 0.0, -5.0),
+    "normal": (5.0, 0.0, 10.0),
+    "slow":   (0.0, 0.0, -5.0),
+    "silent": (-10.0, 0.0, -15.0),
+}
+_PAUSE_WEIGHTS = {
+    "frequent": (0.0, 15.0, 0.0),
+    "minimal":  (0.0, 0.0, 0.0),
+    "none":     (0.0, 5.0, 0.0),
+}
+_TONE_WEIGHTS = {
+    "stressed": (0.0, 25.0, 0.0),
+    "calm":     (0.0, -10.0, 0.0),
+    "neutral":  (0.0, 0.0, 0.0),
+    "excited":  (0.0, 10.0, 0.0),
+}
+
+
 def compute_scores(vision_signals: dict, audio_signals: dict) -> tuple[float, float, float]:
     """
     Derive engagement, stress, and confidence scores from multi-modal signals.
@@ -68,68 +342,47 @@ def compute_scores(vision_signals: dict, audio_signals: dict) -> tuple[float, fl
     pauses = audio_signals.get("pauses", "minimal") if audio_signals else "minimal"
     tone = audio_signals.get("tone_indicator", "neutral") if audio_signals else "neutral"
 
-    # --- Engagement Score ---
-    engagement = 50.0
-    attention_map = {"high": 30.0, "medium": 10.0, "low": -20.0}
-    engagement += attention_map.get(attention, 0.0)
-    emotion_eng_map = {
-        "happy": 15.0, "surprised": 10.0, "neutral": 0.0,
-        "sad": -10.0, "angry": -5.0, "disgusted": -15.0, "fearful": -10.0
-    }
-    engagement += emotion_eng_map.get(emotion, 0.0)
-    posture_map = {"upright": 10.0, "leaning_forward": 15.0, "neutral": 0.0, "slouched": -15.0}
-    engagement += posture_map.get(posture, 0.0)
-    speech_map = {"fast": -5.0, "normal": 5.0, "slow": 0.0, "silent": -10.0}
-    engagement += speech_map.get(speech_speed, 0.0)
-    engagement = max(0.0, min(100.0, engagement))
-
-    # --- Stress Score ---
-    stress = 20.0
-    emotion_stress_map = {
-        "fearful": 40.0, "angry": 35.0, "disgusted": 25.0,
-        "sad": 20.0, "surprised": 15.0, "neutral": 5.0, "happy": -10.0
-    }
-    stress += emotion_stress_map.get(emotion, 0.0)
-    tone_stress_map = {"stressed": 25.0, "calm": -10.0, "neutral": 0.0, "excited": 10.0}
-    stress += tone_stress_map.get(tone, 0.0)
-    pause_stress_map = {"frequent": 15.0, "minimal": 0.0, "none": 5.0}
-    stress += pause_stress_map.get(pauses, 0.0)
-    movement_stress_map = {"restless": 20.0, "moderate": 5.0, "still": -5.0}
-    stress += movement_stress_map.get(movement, 0.0)
-    stress = max(0.0, min(100.0, stress))
-
-    # --- Confidence Score ---
-    confidence = 50.0
-    confidence += attention_map.get(attention, 0.0) * 0.5
-    conf_posture_map = {"upright": 20.0, "leaning_forward": 15.0, "neutral": 0.0, "slouched": -20.0}
-    confidence += conf_posture_map.get(posture, 0.0)
-    conf_emotion_map = {
-        "happy": 15.0, "neutral": 5.0, "surprised": -5.0,
-        "angry": -10.0, "fearful": -25.0, "sad": -15.0, "disgusted": -10.0
-    }
-    confidence += conf_emotion_map.get(emotion, 0.0)
-    conf_speech_map = {"fast": -5.0, "normal": 10.0, "slow": -5.0, "silent": -15.0}
-    confidence += conf_speech_map.get(speech_speed, 0.0)
-    confidence = max(0.0, min(100.0, confidence))
+    return _score_signals(emotion, attention, posture, movement, speech_speed, pauses, tone)
+
+
+# Every input is a small categorical, so the whole signal space is a few
+# thousand tuples — memoizing turns scoring into a single dict probe.
+@lru_cache(maxsize=4096)
+def _score_signals(
+    emotion: str, attention: str, posture: str, movement: str,
+    speech_speed: str, pauses: str, tone: str,
+) -> tuple[float, float, float]:
+    rows = (
+        _EMOTION_WEIGHTS.get(emotion, _NO_EFFECT),
+        _ATTENTION_WEIGHTS.get(attention, _NO_EFFECT),
+        _POSTURE_WEIGHTS.get(posture, _NO_EFFECT),
+        _MOVEMENT_WEIGHTS.get(movement, _NO_EFFECT),
+        _SPEECH_WEIGHTS.get(speech_speed, _NO_EFFECT),
+        _PAUSE_WEIGHTS.get(pauses, _NO_EFFECT),
+        _TONE_WEIGHTS.get(tone, _NO_EFFECT),
+    )
+    # All weights are small multiples of 0.5, so the sums are exact floats
+    engagement, stress, confidence = (
+        max(0.0, min(100.0, base + sum(column)))
+        for base, column in zip(_BASE_SCORES, zip(*rows))
+    )
 
     return engagement, stress, confidence
 
 
-def detect_alerts(current: dict, memory: list[dict]) -> list[str]:
+def detect_alerts(current: dict, memory: StateHistory) -> list[str]:
     """Detect behavioral events by comparing current state to history."""
     alerts = []
     if len(memory) < 2:
         return alerts
 
-    prev_states = memory[-3:]
+    prev_avg_eng, prev_avg_stress = memory.window_means()
 
     # Engagement drop
-    prev_avg_eng = sum(s["engagement_score"] for s in prev_states) / len(prev_states)
     if current["engagement_score"] < prev_avg_eng - 20:
         alerts.append("⚠️ Engagement dropping significantly")
 
     # Stress spike
-    prev_avg_stress = sum(s["stress_score"] for s in prev_states) / len(prev_states)
     if current["stress_score"] > prev_avg_stress + 20:
         alerts.append("⚠️ Stress level spiking")
 
@@ -149,7 +402,7 @@ def detect_alerts(current: dict, memory: list[dict]) -> list[str]:
 
 
 @app.post("/analyze", response_model=AnalyzeResponse)
-async def analyze(request: AnalyzeRequest):
+async def analyze(request: AnalyzeRequest, x_session_id: Optional[str] = Header(None)):
     start_time = time.time()
 
     # Decode base64 frame
@@ -158,45 +411,81 @@ async def analyze(request: AnalyzeRequest):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid base64 frame data")
 
-    # Run vision and audio analysis concurrently
-    vision_task = asyncio.create_task(
-        asyncio.to_thread(analyze_frame, frame_bytes)
+    return await run_analysis(
+        frame_bytes, request.audio_features, x_session_id, start_time, request.pixel_format
     )
 
-    audio_signals = request.audio_features or {}
-
-    vision_signals = await vision_task
-    audio_signals_processed = analyze_audio_features(audio_signals)
-
-    # Compute unified scores
-    engagement, stress, confidence = compute_scores(vision_signals, audio_signals_processed)
-
-    current_state = {
-        "emotion": vision_signals["emotion"],
-        "posture": vision_signals["posture"],
-        "attention": vision_signals["attention"],
-        "movement": vision_signals["movement"],
-        "engagement_score": engagement,
-        "stress_score": stress,
-        "confidence_score": confidence,
-        "audio": audio_signals_processed,
-    }
 
-    # Detect behavioral alerts
-    alerts = detect_alerts(current_state, state_memory)
+@app.post("/analyze_raw", response_model=AnalyzeResponse)
+async def analyze_raw(
+    frame: UploadFile = File(...),
+    audio_features: Optional[str] = Form(None),
+    pixel_format: Literal["bgr", "gray"] = Form("bgr"),
+    x_session_id: Optional[str] = Header(None),
+):
+    """Multipart variant of /analyze: raw JPEG bytes, no base64 overhead."""
+    start_time = time.time()
 
-    # Add to memory (keep last 5)
-    state_memory.append(current_state)
-    if len(state_memory) > 5:
-        state_memory.pop(0)
-
-    # Get LLM advice asynchronously
-    advice = await asyncio.to_thread(
-        get_agent_advice,
-        current_state,
-        state_memory[:-1],
-        alerts
-    )
+    frame_bytes = await frame.read()
+    if not frame_bytes:
+        raise HTTPException(status_code=400, detail="Empty frame upload")
+
+    audio = None
+    if audio_features:
+        try:
+            audio = json.loads(audio_features)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid audio_features JSON")
+        if not isinstance(audio, dict):
+            raise HTTPException(status_code=400, detail="audio_features must be a JSON object")
+
+    return await run_analysis(frame_bytes, audio, x_session_id, start_time, pixel_format)
+
+
+async def run_analysis(
+    frame_bytes: bytes,
+    audio_features: Optional[dict],
+    session_id: Optional[str],
+    start_time: float,
+    pixel_format: str = "bgr",
+) -> AnalyzeResponse:
+    """Shared pipeline behind /analyze and /analyze_raw."""
+    session = await get_session(session_id or "default")
+
+    # Frames of one client are ordered through vision + memory; advice runs
+    # outside the lock so a slow LLM call doesn't stall the next frame.
+    async with session.lock:
+        # Vision goes through the batcher; audio normalization is trivial
+        vision_signals = await submit_frame(frame_bytes, session.vision, pixel_format)
+
+        audio_signals = audio_features or {}
+        audio_signals_processed = analyze_audio_features(audio_signals)
+
+        # Compute unified scores
+        engagement, stress, confidence = compute_scores(vision_signals, audio_signals_processed)
+
+        current_state = {
+            "emotion": vision_signals["emotion"],
+            "posture": vision_signals["posture"],
+            "attention": vision_signals["attention"],
+            "movement": vision_signals["movement"],
+            "engagement_score": engagement,
+            "stress_score": stress,
+            "confidence_score": confidence,
+            "audio": audio_signals_processed,
+            # Fallback zones/buckets, quantized once here rather than per call
+            "buckets": bucketize(stress, engagement),
+        }
+
+        # Detect behavioral alerts
+        alerts = detect_alerts(current_state, session.memory)
+
+        history = list(session.memory)
+        session.memory.append(current_state)  # keeps the last 5
+
+    # Get LLM advice asynchronously (non-blocking HTTP on the event loop)
+    use_rotation_state(session.rotation)
+    advice = await get_agent_advice(current_state, history[-4:], alerts)
 
     elapsed_ms = (time.time() - start_time) * 1000
 
@@ -216,7 +505,11 @@ async def analyze(request: AnalyzeRequest):
 
 @app.get("/health")
 async def health():
-    return {"status": "ok", "version": "1.0.0"}
+    return {
+        "status": "ok",
+        "version": "1.0.0",
+        "llm_retries": reasoning.llm_retry_counts,
+    }
 
 @app.post("/launch-desktop")
 async def launch_desktop():
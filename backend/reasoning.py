@@ -9,7 +9,25 @@ Deep psychology-based advice using:
 - OCEAN personality inference from real-time behavior
 - Cognitive Behavioral Signal Interpretation
 """
+import asyncio
+import bisect
+import itertools
+import json
+import math
 import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import lru_cache
+from typing import Any, Iterator, Sequence
+import httpx
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,12 +42,65 @@ elif OPENAI_API_KEY:
 else:
     LLM_PROVIDER = "fallback"
 
+# Timeouts _with_retries retries on; the SDKs may raise their own first
+_TIMEOUT_ERRORS: tuple[type[BaseException], ...] = (asyncio.TimeoutError, httpx.TimeoutException)
+
 if LLM_PROVIDER == "openai":
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
-elif LLM_PROVIDER == "gemini":
+    from openai import APITimeoutError, AsyncOpenAI
+    # Retries are handled by _with_retries, which tightens the per-try timeout
+    openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+    _TIMEOUT_ERRORS += (APITimeoutError,)
+
+# Gemini transport: "sdk" (google-genai async client) or "rest" (raw httpx,
+# for environments where the SDK rejects the key)
+GEMINI_TRANSPORT = os.getenv("COGNISYNC_GEMINI_TRANSPORT", "sdk").lower()
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); HTTP/1.1 keep-alive otherwise
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Optional orjson: C encoder/decoder for the Gemini request/response bodies
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _dumps(obj) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _loads(data: bytes | str):
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
+
+# One pooled client for the whole process: keep-alive connections skip the
+# TCP + TLS handshake on every advice request.
+_http = httpx.AsyncClient(
+    timeout=httpx.Timeout(8.0),
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    http2=HTTP2_AVAILABLE,
+)
+
+if LLM_PROVIDER == "gemini":
     from google import genai as google_genai
-    gemini_client = google_genai.Client(api_key=GEMINI_API_KEY)
+    from google.genai import errors as genai_errors, types as genai_types
+    try:
+        # Share the pooled (HTTP/2) client so SDK calls multiplex over it too
+        _gemini_http_options = genai_types.HttpOptions(
+            api_version="v1beta", httpx_async_client=_http
+        )
+    except Exception:
+        _gemini_http_options = genai_types.HttpOptions(api_version="v1beta")
+    gemini_client = google_genai.Client(
+        api_key=GEMINI_API_KEY, http_options=_gemini_http_options
+    )
 
 
 SYSTEM_PROMPT = """You are CogniSync, an elite real-time behavioral intelligence agent trained in FBI hostage negotiation (Chris Voss), Cialdini's influence principles, emotional intelligence (Goleman), and nonverbal signal analysis (Navarro).
@@ -45,104 +116,346 @@ RULES:
 6. Reference the trend if something changed across the last 2-3 states.
 """
 
+# System-prompt prefix: built once, prepended by a single concat
+_SYSTEM_PREFIX = SYSTEM_PROMPT + "\n\n"
+
+
+_EMPTY: dict[str, str] = {}
+
 
 def _build_prompt(current: dict, history: list, alerts: list) -> str:
-    audio = current.get("audio", {})
-    emotion = current["emotion"]
-    posture = current["posture"]
-    attention = current["attention"]
-    movement = current["movement"]
-    engagement = current["engagement_score"]
-    stress = current["stress_score"]
-    confidence = current["confidence_score"]
+    c = current
+    a = c.get("audio") or _EMPTY
+    em, po, at, mv = c["emotion"], c["posture"], c["attention"], c["movement"]
+    eg, st, cf = c["engagement_score"], c["stress_score"], c["confidence_score"]
 
     trend_text = ""
     if len(history) >= 2:
         prev = history[-1]
-        eng_delta = engagement - prev["engagement_score"]
-        stress_delta = stress - prev["stress_score"]
-        conf_delta = confidence - prev["confidence_score"]
+        # "+.0f" signs the delta itself: +5 / -3 / +0
         trend_text = (
-            f"\nTREND: Engagement {'+' if eng_delta>=0 else ''}{eng_delta:.0f}% "
-            f"| Stress {'+' if stress_delta>=0 else ''}{stress_delta:.0f}% "
-            f"| Confidence {'+' if conf_delta>=0 else ''}{conf_delta:.0f}%"
+            f"\nTREND: Engagement {eg - prev['engagement_score']:+.0f}% "
+            f"| Stress {st - prev['stress_score']:+.0f}% "
+            f"| Confidence {cf - prev['confidence_score']:+.0f}%"
         )
-    if len(history) >= 3:
-        past_emotions = [h["emotion"] for h in history[-3:]]
-        trend_text += f"\nEmotion sequence: {' → '.join(past_emotions)} → {emotion}"
+        if len(history) >= 3:
+            h1, h2, h3 = history[-3:]
+            trend_text += (
+                f"\nEmotion sequence: {h1['emotion']} → {h2['emotion']} → {h3['emotion']} → {em}"
+            )
 
     alert_text = f"\nACTIVE ALERTS: {'; '.join(alerts)}" if alerts else ""
 
     return (
         f"LIVE SIGNALS:\n"
-        f"Emotion: {emotion} | Posture: {posture} | Attention: {attention} | Movement: {movement}\n"
-        f"Speech: {audio.get('speech_speed','normal')} | Pauses: {audio.get('pauses','minimal')} | Tone: {audio.get('tone_indicator','neutral')}\n"
-        f"Engagement: {engagement:.0f}% | Stress: {stress:.0f}% | Confidence: {confidence:.0f}%"
+        f"Emotion: {em} | Posture: {po} | Attention: {at} | Movement: {mv}\n"
+        f"Speech: {a.get('speech_speed', 'normal')} | Pauses: {a.get('pauses', 'minimal')} "
+        f"| Tone: {a.get('tone_indicator', 'neutral')}\n"
+        f"Engagement: {eg:.0f}% | Stress: {st:.0f}% | Confidence: {cf:.0f}%"
         f"{trend_text}{alert_text}\n\n"
         f"Provide ONE tactical intervention (1-2 sentences). Be specific, psychological, actionable."
     )
 
 
-def get_agent_advice(current: dict, history: list, alerts: list) -> str:
+# Upper bound on in-flight LLM requests, sized to the provider's rate limits
+_DEFAULT_LLM_CONCURRENCY = {"gemini": 10, "openai": 50}
+LLM_CONCURRENCY = int(
+    os.getenv("COGNISYNC_LLM_CONCURRENCY", _DEFAULT_LLM_CONCURRENCY.get(LLM_PROVIDER, 10))
+)
+_llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# ── LLM response cache ────────────────────────────────────────────────────────
+# Signals drift slowly between frames, so advice is reused for states that
+# match on a coarsened key. Entries expire after RESPONSE_CACHE_TTL_S so the
+# advice keeps moving; only LLM answers are cached (the fallback rotates).
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL_S = 30.0
+
+_resp_cache: "OrderedDict[tuple, tuple[float, str]]" = OrderedDict()
+
+
+def _cache_key(current: dict, alerts: list) -> tuple:
+    return (
+        current["emotion"],
+        current["posture"],
+        current["attention"],
+        current["movement"],
+        int(current["engagement_score"]) // 10,
+        int(current["stress_score"]) // 10,
+        int(current["confidence_score"]) // 10,
+        tuple(sorted(alerts)),
+    )
+
+
+def _cache_get(key: tuple):
+    entry = _resp_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, advice = entry
+    if time.monotonic() - stored_at > RESPONSE_CACHE_TTL_S:
+        del _resp_cache[key]
+        return None
+    _resp_cache.move_to_end(key)
+    return advice
+
+
+def _cache_put(key: tuple, advice: str) -> None:
+    _resp_cache[key] = (time.monotonic(), advice)
+    _resp_cache.move_to_end(key)
+    if len(_resp_cache) > RESPONSE_CACHE_SIZE:
+        _resp_cache.popitem(last=False)
+
+
+# Front slot ahead of the LRU: the previous frame's finer-grained key and its
+# advice, reused for LAST_ADVICE_TTL_S when consecutive frames match.
+LAST_ADVICE_TTL_S = 2.0
+_last: dict[str, Any] = {"key": None, "out": None, "ts": 0.0}
+
+
+def _last_key(current: dict, alerts: list) -> tuple:
+    return (
+        current["emotion"],
+        current["posture"],
+        current["attention"],
+        current["movement"],
+        current["engagement_score"] // 5,
+        current["stress_score"] // 5,
+        current["confidence_score"] // 5,
+        tuple(alerts),
+    )
+
+
+async def get_agent_advice(current: dict, history: list, alerts: list) -> str:
+    if LLM_PROVIDER == "fallback":
+        return _psychology_fallback(current, history, alerts)
+
+    last_key = _last_key(current, alerts)
+    now = time.monotonic()
+    if last_key == _last["key"] and now - _last["ts"] < LAST_ADVICE_TTL_S:
+        return _last["out"]
+
+    key = _cache_key(current, alerts)
+    advice = _cache_get(key)
+    if advice is not None:
+        return advice
+
     prompt = _build_prompt(current, history, alerts)
-    if LLM_PROVIDER == "openai":
-        return _call_openai(prompt)
-    elif LLM_PROVIDER == "gemini":
-        return _call_gemini(prompt, current, history, alerts)
+    async with _llm_semaphore:
+        if LLM_PROVIDER == "openai":
+            advice = await _call_openai(prompt)
+        else:
+            advice = await _call_gemini(prompt)
+    if advice:
+        _cache_put(key, advice)
+        _last.update(key=last_key, out=advice, ts=time.monotonic())
+        return advice
+    # Always fall back with REAL signal data, not empty dicts
     return _psychology_fallback(current, history, alerts)
 
 
-def _call_openai(prompt: str) -> str:
+async def get_agent_advice_batch(items: list) -> list:
+    """
+    Advice for many (current, history, alerts) tuples at once.
+    Requests run concurrently, at most LLM_CONCURRENCY in flight, so a batch
+    costs roughly one round-trip of wall time. Independent calls that share
+    inputs belong in one batch rather than awaited back-to-back.
+    """
+    return await asyncio.gather(*(get_agent_advice(*item) for item in items))
+
+
+_sync_runner = None
+
+
+def get_agent_advice_sync(current: dict, history: list, alerts: list) -> str:
+    """
+    Blocking wrapper for callers outside an event loop.
+    Reuses one private loop: pooled connections are bound to the loop that
+    opened them, so a fresh asyncio.run() per call would break keep-alive.
+    Don't mix with async callers in the same process.
+    """
+    global _sync_runner
+    if _sync_runner is None:
+        _sync_runner = asyncio.Runner()
+    return _sync_runner.run(get_agent_advice(current, history, alerts))
+
+
+async def aclose() -> None:
+    """Close the pooled HTTP clients; call once at shutdown."""
+    await _http.aclose()
+    if LLM_PROVIDER == "openai":
+        await openai_client.close()
+
+
+# ── Streaming cutoff ──────────────────────────────────────────────────────────
+# Advice is 1-2 sentences, so responses are streamed and the request is closed
+# once ADVICE_MAX_SENTENCES sentences have arrived instead of waiting out the
+# rest of the generation. A terminator only counts when whitespace and then a
+# capital, digit or opening quote follow, and not after a known abbreviation,
+# so "e.g. a question" or "Dr. Voss" doesn't end the advice early.
+ADVICE_MAX_SENTENCES = 2
+_RE_SENTENCE_END = re.compile(r"""[.!?]+["'”’)\]]*(?=\s+["'“‘(\[]*[A-Z0-9])""")
+_ABBREVIATIONS = frozenset({"e.g", "i.e", "vs", "cf", "dr", "mr", "mrs", "ms", "prof"})
+
+
+def _sentence_cut(buf: str):
+    """Index just past the ADVICE_MAX_SENTENCES-th sentence, or None."""
+    count = 0
+    for m in _RE_SENTENCE_END.finditer(buf):
+        if buf[m.start()] == "." and _is_abbreviation(buf, m.start()):
+            continue
+        count += 1
+        if count == ADVICE_MAX_SENTENCES:
+            return m.end()
+    return None
+
+
+def _is_abbreviation(buf: str, dot: int) -> bool:
+    """Whether the word ending at the "." buf[dot] is in _ABBREVIATIONS."""
+    start = dot
+    while start and not buf[start - 1].isspace() and buf[start - 1] not in "\"'“‘(":
+        start -= 1
+    return buf[start:dot].lower() in _ABBREVIATIONS
+
+
+# ── Timeouts + retry ──────────────────────────────────────────────────────────
+# Each attempt gets its own wall-clock budget; a timed-out attempt is retried
+# after a jittered exponential backoff instead of waiting out one long timeout.
+# llm_retry_counts is exposed for monitoring (see /health).
+LLM_TIMEOUTS_S = (2.0, 3.0, 5.0)
+LLM_BACKOFF_BASE_S = 0.1
+
+llm_retry_counts = {"gemini": 0, "openai": 0}
+
+
+async def _with_retries(provider: str, attempt):
+    """Run attempt(timeout) under LLM_TIMEOUTS_S; None once every try has timed out."""
+    for i, timeout in enumerate(LLM_TIMEOUTS_S):
+        if i:
+            llm_retry_counts[provider] += 1
+            await asyncio.sleep(random.uniform(0, LLM_BACKOFF_BASE_S * 2 ** i))
+        try:
+            return await asyncio.wait_for(attempt(timeout), timeout)
+        except _TIMEOUT_ERRORS:
+            print(f"[CogniSync] LLM ({provider}) request timed out after {timeout:g}s (try {i + 1})")
+    return None
+
+
+async def _call_openai(prompt: str):
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=120,
-            temperature=0.85,
-            timeout=5.0,
-        )
-        return response.choices[0].message.content.strip()
+        return await _with_retries("openai", lambda timeout: _openai_attempt(prompt, timeout))
     except Exception:
         return None  # caller will use psychology fallback
 
 
-def _call_gemini(prompt: str, current: dict, history: list, alerts: list) -> str:
+async def _openai_attempt(prompt: str, timeout: float):
+    stream = await openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=120,
+        temperature=0.85,
+        timeout=timeout,
+        stream=True,
+    )
+    try:
+        buf = ""
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            buf += chunk.choices[0].delta.content or ""
+            cut = _sentence_cut(buf)
+            if cut is not None:
+                return buf[:cut].strip()
+        return buf.strip() or None
+    finally:
+        await stream.close()
+
+
+# Static parts of the Gemini request, built once
+_GEMINI_URL = (
+    f"https://generativelanguage.googleapis.com/v1beta/models/"
+    f"gemini-2.5-flash:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}"
+)
+_GEN_CFG = {"maxOutputTokens": 120, "temperature": 0.85}
+_JSON_HEADERS = {"content-type": "application/json"}
+
+async def _call_gemini(prompt: str):
     """
-    Call Gemini via direct REST API (works with AI Studio AIza... keys).
-    The google-genai SDK v1.64 returns NOT_FOUND for AI Studio keys with v1beta endpoint.
+    Call Gemini through the google-genai async client, or the direct REST API
+    when COGNISYNC_GEMINI_TRANSPORT=rest. Some SDK versions return NOT_FOUND
+    for AI Studio keys; on that the process switches to REST for good.
+    Returns None on failure so the caller can use the psychology fallback.
     """
-    import httpx
-    key = GEMINI_API_KEY
-    full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
-    url = (
-        f"https://generativelanguage.googleapis.com/v1beta/models/"
-        f"gemini-2.5-flash:generateContent?key={key}"
-    )
-    payload = {
-        "contents": [{"parts": [{"text": full_prompt}]}],
-        "generationConfig": {
-            "maxOutputTokens": 120,
-            "temperature": 0.85,
-        },
-    }
+    global GEMINI_TRANSPORT
+    if GEMINI_TRANSPORT == "sdk":
+        try:
+            return await _with_retries(
+                "gemini", lambda timeout: _gemini_sdk_attempt(prompt)
+            )
+        except genai_errors.APIError as e:
+            if e.code != 404:
+                print(f"[CogniSync] Gemini API error {e.code}: {str(e)[:120]}")
+                return None
+            print("[CogniSync] Gemini SDK returned NOT_FOUND — switching to REST")
+            GEMINI_TRANSPORT = "rest"
+        except Exception as e:
+            print(f"[CogniSync] Gemini request failed: {e}")
+            return None
+
+    body = _dumps({
+        "contents": [{"parts": [{"text": _SYSTEM_PREFIX + prompt}]}],
+        "generationConfig": _GEN_CFG,
+    })
     try:
-        r = httpx.post(url, json=payload, timeout=8.0)
-        if r.status_code == 200:
-            data = r.json()
-            candidates = data.get("candidates", [])
-            if candidates:
-                parts = candidates[0].get("content", {}).get("parts", [])
-                if parts:
-                    return parts[0].get("text", "").strip()
-        # Non-200: log and fall through to psychology engine
-        print(f"[CogniSync] Gemini API error {r.status_code}: {r.text[:120]}")
+        return await _with_retries("gemini", lambda timeout: _gemini_attempt(body, timeout))
     except Exception as e:
         print(f"[CogniSync] Gemini request failed: {e}")
-    # Always fall back with REAL signal data, not empty dicts
-    return _psychology_fallback(current, history, alerts)
+    return None
+
+
+async def _gemini_sdk_attempt(prompt: str):
+    config = genai_types.GenerateContentConfig(max_output_tokens=120, temperature=0.85)
+    stream = await gemini_client.aio.models.generate_content_stream(
+        model="gemini-2.5-flash", contents=_SYSTEM_PREFIX + prompt, config=config
+    )
+    try:
+        buf = ""
+        async for chunk in stream:
+            buf += chunk.text or ""
+            cut = _sentence_cut(buf)
+            if cut is not None:
+                return buf[:cut].strip()
+        return buf.strip() or None
+    finally:
+        await stream.aclose()  # type: ignore[attr-defined]  # an async generator
+
+
+async def _gemini_attempt(body: bytes, timeout: float):
+    async with _http.stream(
+        "POST", _GEMINI_URL, content=body, headers=_JSON_HEADERS, timeout=timeout
+    ) as r:
+        if r.status_code != 200:
+            await r.aread()
+            # Non-200: log and fall through to psychology engine
+            print(f"[CogniSync] Gemini API error {r.status_code}: {r.text[:120]}")
+            return None
+
+        # Server-sent events: each "data:" line is a partial response
+        buf = ""
+        async for line in r.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            candidates = _loads(line[5:]).get("candidates", [])
+            if not candidates:
+                continue
+            for part in candidates[0].get("content", {}).get("parts", []):
+                buf += part.get("text", "")
+            cut = _sentence_cut(buf)
+            if cut is not None:
+                return buf[:cut].strip()  # leaving the block closes the stream
+        return buf.strip() or None
 
 
 
@@ -150,241 +463,347 @@ def _call_gemini(prompt: str, current: dict, history: list, alerts: list) -> str
 # DEEP PSYCHOLOGY FALLBACK ENGINE
 # ─────────────────────────────────────────────────────────────────────────────
 
-# Rotation: each TACTICS key maps to a LIST of 3 tactics.
+# Rotation: each TACTICS key maps to a sequence of 3 tactics.
 # Every ROTATION_EVERY frames of the same key, the next tactic in the list is used.
 ROTATION_EVERY = 4
 
-_key_hit_counts: dict = {}
-_last_key = [None]
+# Fallback types, spelled out for static checkers and AOT compilers (mypyc):
+# a TACTICS key is an (emotion, attention, s_zone, e_zone) state or a sentinel.
+TacticKey = tuple[str, str, str, str] | str
+Resolution = tuple[TacticKey, int, bool, str]  # see _resolve_key
 
 
-def _get_tactic(key) -> str:
-    """Return the next rotating tactic for this key."""
-    if _last_key[0] != key:
-        # State changed — reset old key's counter
-        if _last_key[0]:
-            _key_hit_counts.pop(_last_key[0], None)
-        _last_key[0] = key
+@dataclass(slots=True, eq=False)
+class RotationState:
+    """
+    Rotation state for the fallback engine, one per client session.
+    Only the most recently looked-up key has a live counter: looking up any
+    other key (hit or miss) resets it.
+    The lock makes each read-increment atomic: a session's advice calls can
+    overlap, and the fallback also runs from get_agent_advice_sync's thread.
+    """
+
+    last: TacticKey | None = None  # most recently looked-up key
+    hits: int = 0  # consecutive lookups of `last`
+    # Rotating default advice; next() on a cycle is a single C call
+    default_cycle: Iterator[str] = field(
+        default_factory=lambda: itertools.cycle(_default_pool), repr=False
+    )
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
-    hits = _key_hit_counts.get(key, 0)
-    _key_hit_counts[key] = hits + 1
 
-    entry = TACTICS.get(key)
+def _get_tactic(key: TacticKey, run: int = 1, whole: bool = True) -> str | None:
+    """
+    Return the next rotating tactic for this key after recording `run`
+    consecutive lookups of it. `whole=False` means a different key was looked
+    up first in this frame, which resets the counter just as that lookup would.
+    """
+    rot = _rotation.get()
+    with rot.lock:
+        # State changed — reset old key's counter
+        base = rot.hits if whole and rot.last == key else 0
+        rot.last = key
+        rot.hits = base + run
+
+    entry = _tactics_get(key)
     if entry is None:
         return None
-    if isinstance(entry, str):
-        return entry
-    idx = (hits // ROTATION_EVERY) % len(entry)
+    idx = ((base + run - 1) // ROTATION_EVERY) % len(entry)
     return entry[idx]
 
 
-def _zone(val: float, low: float = 35, high: float = 65) -> str:
-    if val < low:
-        return "low"
-    if val > high:
-        return "high"
-    return "mid"
+def _rotate(key: TacticKey, entry: tuple[str, ...]) -> str:
+    """_get_tactic for a single lookup of a key already known to map to `entry`."""
+    rot = _rotation.get()
+    with rot.lock:
+        hits = rot.hits if rot.last == key else 0
+        rot.last = key
+        rot.hits = hits + 1
+    return entry[(hits // ROTATION_EVERY) % len(entry)]
+
+
+# Categorical labels, interned once; the fallback compares them by identity.
+# The values it sees are interned too (labels from analyzer/zone literals,
+# emotion/attention via sys.intern in _psychology_fallback).
+_LOW, _MID, _HIGH, _MEDIUM = map(sys.intern, ("low", "mid", "high", "medium"))
+_FLOW = sys.intern("flow")  # engagement bucket above 70
+
+# _resolve_key outcomes
+_OUT_TACTIC, _OUT_FLOW, _OUT_DEFAULT = map(sys.intern, ("tactic", "flow", "default"))
 
+# Zone lookup: bisect_right over the thresholds indexes the zone name directly.
+# Below 35 is low, above 65 is high, both bounds inclusive in mid — hence the
+# upper threshold is the next float after 65.
+_ZONE_THRESH = (35.0, math.nextafter(65.0, math.inf))
+_ZONE_NAMES = (_LOW, _MID, _HIGH)
 
-# Each entry: list of 3 tactics [initial → deeper → escalation]
-TACTICS = {
+
+# Integer codes for the categorical inputs; the label tuples (_ZONE_NAMES,
+# _ATTENTION_NAMES, _E_BUCKETS) are indexed by these values.
+class Attention(IntEnum):
+    HIGH = 0
+    MEDIUM = 1
+    LOW = 2
+
+
+class Zone(IntEnum):
+    LOW = 0  # < 35
+    MID = 1  # 35-65
+    HIGH = 2  # > 65
+
+
+class EngagementBucket(IntEnum):
+    LOW = 0  # < 30
+    MID = 1  # 30-70
+    FLOW = 2  # > 70
+
+
+_ATTENTION_NAMES = (_HIGH, _MEDIUM, _LOW)
+
+
+def bucketize(stress: float, engagement: float) -> tuple[int, int, int]:
+    """
+    Quantize a frame's scores into the fallback's categorical inputs:
+    (stress Zone, engagement Zone, EngagementBucket) as plain ints. Call it
+    once when a frame is ingested and store the result under "buckets".
+    """
+    return (
+        bisect.bisect_right(_ZONE_THRESH, stress),
+        bisect.bisect_right(_ZONE_THRESH, engagement),
+        0 if engagement < 30 else 2 if engagement > 70 else 1,
+    )
+
+
+# Each entry: 3 tactics [initial → deeper → escalation]
+TACTICS: dict[TacticKey, tuple[str, ...]] = {
 
     # ── LOW ATTENTION ─────────────────────────────────────────────────────────
-    ("neutral", "low", "low", "low"): [
+    ("neutral", "low", "low", "low"): (
         "Gaze drifted + engagement collapsed — pattern interrupt: call their name, hold 3 seconds of silence, then ask ONE question: 'What's actually on your mind right now?'",
         "Still disengaged after the interrupt. Abandon the current frame entirely. Ask: 'If we set aside everything discussed so far — what do YOU think the real issue is?'",
         "Prolonged disengagement with calm signals = boredom. Use the Ben Franklin effect: ask them to help you with something small. Requested effort re-activates investment.",
-    ],
-    ("neutral", "low", "mid", "low"): [
+    ),
+    ("neutral", "low", "mid", "low"): (
         "Attention lost under stress — they're mentally elsewhere under pressure. Stop all content. Ask: 'What's the one thing that needs to be resolved for you to stay present here?'",
         "Still distracted under stress. Their working memory is saturated. Strip down to ONE sentence, then stay silent — give their brain space to surface what's blocking them.",
         "Sustained stress-distraction. Name it directly: 'It feels like something outside this conversation is competing for your attention.' Naming the distraction often dissolves it.",
-    ],
-    ("neutral", "low", "low", "mid"): [
+    ),
+    ("neutral", "low", "low", "mid"): (
         "Mild attention drift. Deploy the Ben Franklin effect: ask a small favor or genuine opinion to re-activate investment. Effort creates engagement.",
         "Still wandering. Introduce a surprising fact or unexpected reframe to trigger a novelty response and pull focus back.",
         "Try an information gap hook: reveal one piece of information they don't know yet, then pause. The gap creates an itch that re-engages attention automatically.",
-    ],
-    ("neutral", "low", "mid", "mid"): [
+    ),
+    ("neutral", "low", "mid", "mid"): (
         "Attention fracturing under moderate stress. Ask: 'If you had to rank the priorities right now, what comes first?' Decision-making forces re-engagement.",
         "Still split-attention. Strip your message to ONE sentence, hold silence, don't fill it. Let them break the silence — what they say next is your real intelligence.",
         "Still distracted. Reframe by asking for their story from the beginning: narrative mode re-engages the prefrontal cortex.",
-    ],
+    ),
 
     # ── NEUTRAL / ANALYTICAL ──────────────────────────────────────────────────
-    ("neutral", "high", "low", "high"): [
+    ("neutral", "high", "low", "high"): (
         "Peak analytical state — focused gaze, calm signals. Introduce your strongest data point and follow with: 'What specific outcome matters most to you?'",
         "Still in analytical mode. Use the 'Columbo technique': ask a deceptively simple question about a complex topic. Their detailed answer reveals exactly what they care about.",
         "Sustained high focus. Deploy your core message and hold silence. Analytically-dominant people perceive silence as confidence, not weakness.",
-    ],
-    ("neutral", "high", "low", "mid"): [
+    ),
+    ("neutral", "high", "low", "mid"): (
         "Low stress, high attention — clean slate. Deploy 'commitment and consistency': ask a small yes-question first: 'Would you agree that X is the main priority here?'",
         "Still focused and calm. Use authority anchoring: cite a specific credible source before your point. Authority cues double retention in calm attentive listeners.",
         "Sustained attentive baseline. Introduce a contrast: show where things could be different. Contrast drives decisions even when emotional arousal is low.",
-    ],
-    ("neutral", "medium", "low", "high"): [
+    ),
+    ("neutral", "medium", "low", "high"): (
         "Good engagement with calm physiology — ideal for rapport deepening. Mirror their vocabulary, sentence length, and pace precisely.",
         "Sustained high engagement. Use progressive disclosure — one new piece of information at a time. Scarcity of information increases perceived value.",
         "Long-duration high-engagement state. Ask your most important question now — they are mentally ready to engage at depth.",
-    ],
-    ("neutral", "medium", "low", "mid"): [
+    ),
+    ("neutral", "medium", "low", "mid"): (
         "Stable moderate engagement — rapport territory. Use strategic mirroring: repeat their last 2-3 words as a question to deepen their explanation and signal deep listening.",
         "Continued stable baseline. Ask: 'How does this connect to what matters most to you?' Open-ended questions build psychological intimacy and increase investment.",
         "Sustained stable state. Deploy a label: 'It seems like you're carefully considering the implications here.' A well-placed label makes them feel deeply understood.",
-    ],
-    ("neutral", "medium", "mid", "mid"): [
+    ),
+    ("neutral", "medium", "mid", "mid"): (
         "Moderate stress with partial engagement — say less, ask more. Questions generate lower cognitive load than statements.",
         "Continued mid-stress. Use a 'no'-oriented question: 'Would it be unreasonable to say you'd prefer to slow down here?' Gives them control and releases pressure.",
         "Persisting mid-stress. Try reframing entirely: introduce a third perspective neither of you has discussed. Novel frames release cognitive tension.",
-    ],
-    ("neutral", "high", "mid", "high"): [
+    ),
+    ("neutral", "high", "mid", "high"): (
         "High attention + rising stress = cognitive load building. FBI technique: slow your speech 20%, drop pitch, label: 'It seems like you're weighing something carefully…'",
         "High engagement under moderate stress. Ask expansively: 'If pressure weren't a factor at all, what would you do?' Removes the stress frame momentarily.",
         "Sustained stress under high attention. Use the 'accusation audit': name every objection you think they have before they voice it. Anticipating resistance disarms it.",
-    ],
+    ),
 
     # ── HAPPY ─────────────────────────────────────────────────────────────────
-    ("happy", "high", "low", "high"): [
+    ("happy", "high", "low", "high"): (
         "Buying signal — smile, upright posture, full attention. This is your close window. Use the assumptive close: 'So the next step would be…' — transition as if agreement is made.",
         "Still at peak positive state. Switch to a choice close: 'Would you prefer to start with X or Y?' Either answer advances things forward.",
         "Sustained happiness + high engagement. Activate social proof NOW: 'Others in your exact situation chose this path because…' Positive states make social proof 3× more effective.",
-    ],
-    ("happy", "high", "low", "mid"): [
+    ),
+    ("happy", "high", "low", "mid"): (
         "Positive affect + focused attention = likability peak. Activate reciprocity: share something exclusive or personal to cement the connection before your key ask.",
         "Still at likability peak. Express a genuine point of commonality — perceived similarity is one of the fastest compliance triggers known.",
         "Sustained positive engagement. Tell a relevant success story about someone similar to them. Story activates mirror neurons and bypasses analytical resistance.",
-    ],
-    ("happy", "medium", "low", "high"): [
+    ),
+    ("happy", "medium", "low", "high"): (
         "Relaxed happiness + high engagement — perfect for social proof. Reference: 'Others in this situation have found that…' to anchor your proposal in consensus.",
         "Positive state, moderate attention. Ask for their gut reaction: 'What's your instinct on this?' Gut-level questions deepen investment in outcomes.",
         "Sustained positive state. Use future-pacing: 'Imagine six months from now this worked — what changed?' Future projection in a positive state is highly generative.",
-    ],
-    ("happy", "high", "mid", "high"): [
+    ),
+    ("happy", "high", "mid", "high"): (
         "Joy + slight stress — excitement or performance anxiety. Channel it: 'If this worked perfectly, what would that look like for you?'",
         "Continued positive arousal. Use 'foot in the door': make your smallest possible ask first. Success with small asks primes compliance for larger ones.",
         "Sustained excited state. Connect to their identity: 'This fits someone who values X — and from everything you've said, that's exactly who you are.' Identity framing is deeply motivating.",
-    ],
+    ),
 
     # ── SURPRISED ─────────────────────────────────────────────────────────────
-    ("surprised", "high", "low", "high"): [
+    ("surprised", "high", "low", "high"): (
         "Peak curiosity window — elevated brows, wide eyes. Deliver your single strongest point RIGHT NOW while the dopamine spike is active. Hesitation closes this window in 8 seconds.",
         "Still in curiosity state. Stack a second surprise layer: 'And what makes this even more compelling is…' Stacked surprises compound the dopamine response.",
         "Sustained surprise = genuine fascination. Transition to co-creation: 'What would YOU do with this information?' Co-creation in curiosity state is extremely productive.",
-    ],
-    ("surprised", "high", "mid", "mid"): [
+    ),
+    ("surprised", "high", "mid", "mid"): (
         "Surprise + moderate stress — new information is creating cognitive dissonance. Hold silence for 5 seconds, then ask: 'What's your first reaction to that?'",
         "Still processing. Ask: 'What part of this is most unexpected to you?' Surfaces their actual objection or point of fascination — critical intelligence.",
         "Continued surprise-processing. Use an accusation audit: name all the doubts you think they're having. Naming eliminates resistance faster than overcoming it.",
-    ],
-    ("surprised", "medium", "mid", "mid"): [
+    ),
+    ("surprised", "medium", "mid", "mid"): (
         "Mild surprise with moderate engagement — processing is happening. Use the accusation audit: preemptively name their concern before they voice it.",
         "Still processing mildly. Ask: 'What would need to be true for this to make complete sense to you?' Question converts surprise into a solvable frame.",
         "Sustained mild surprise. Introduce additional supporting evidence — people in a curiosity state absorb information more quickly than in any other state.",
-    ],
+    ),
 
     # ── FEARFUL ───────────────────────────────────────────────────────────────
-    ("fearful", "low", "high", "low"): [
+    ("fearful", "low", "high", "low"): (
         "Fight-or-flight activated — body withdrawal, speech pauses. STOP all arguments. Label: 'It seems like this feels overwhelming right now.' Then wait silently.",
         "Still in fear state — amygdala hijacked, logic inaccessible. Offer an off-ramp: 'We don't need to solve this right now. What would make this feel less urgent?'",
         "Prolonged fear. Match your pace to a calm FM DJ voice: very slow, warm, deliberate. Their nervous system will entrain to your calm signals within 90 seconds.",
-    ],
-    ("fearful", "medium", "high", "low"): [
+    ),
+    ("fearful", "medium", "high", "low"): (
         "Stress flooding with partial attention. Ask a 'no'-oriented question: 'Would it be wrong to say you need more time on this?' Restores control.",
         "Fear persisting. Label the internal experience: 'It seems like there's a concern that hasn't been voiced yet.' Creates permission to surface the real objection.",
         "Sustained fear-partial-attention mix. Validate completely BEFORE introducing any counter-information. Validation before information is the FBI protocol.",
-    ],
-    ("fearful", "low", "high", "mid"): [
+    ),
+    ("fearful", "low", "high", "mid"): (
         "Fear state with moderate engagement — they want to engage but feel unsafe. Validate fully: 'That concern makes complete sense given what you've described.'",
         "Still fearful but engaged. Create psychological safety: 'There's no wrong answer here — I'm genuinely trying to understand your perspective.' Safety unlocks re-engagement.",
         "Prolonged fear-engagement mix. Ask: 'What specifically would need to be true for you to feel confident moving forward?' Converts anxiety into a solvable problem.",
-    ],
-    ("fearful", "medium", "mid", "mid"): [
+    ),
+    ("fearful", "medium", "mid", "mid"): (
         "Mild anxiety — this is buying anxiety, not rejection. Use 'That's right': summarize their position so accurately they feel completely understood.",
         "Continued mild anxiety. Introduce future certainty: describe a specific positive future involving them. Certainty of outcome reduces anxiety biologically.",
         "Persistent low-grade anxiety. Ask: 'What's the one thing that would eliminate that concern?' Directs their energy toward solutions rather than problems.",
-    ],
+    ),
 
     # ── ANGRY ─────────────────────────────────────────────────────────────────
-    ("angry", "medium", "high", "low"): [
+    ("angry", "medium", "high", "low"): (
         "Anger spike — jaw tension, restless movement. Do NOT match energy. Lower your volume 30%, let them finish, then label: 'It sounds like this has been frustrating for a long time.'",
         "Anger persisting. Use minimal encouragers — say only 'go on' or 'tell me more'. People cannot sustain anger while feeling genuinely heard.",
         "Sustained anger + low engagement: a core need is unmet. Ask: 'What do you actually need from this situation?' — shift from positions to underlying needs.",
-    ],
-    ("angry", "low", "high", "low"): [
+    ),
+    ("angry", "low", "high", "low"): (
         "Hot anger + disengagement — they've mentally left. Emergency pivot: 'Help me understand — what would have to change for this to work for you?' Ask ONLY about their perspective.",
         "Still angry and gone. Acknowledge without defending: 'I hear that this is not working. That matters.' Pure acknowledgment without defense.",
         "Prolonged anger-disengagement. Give them power: 'What would you do differently if you were in charge of this?' Positions them as the expert.",
-    ],
-    ("angry", "medium", "high", "mid"): [
+    ),
+    ("angry", "medium", "high", "mid"): (
         "Irritation + partial engagement — they feel unheard. Mirror their last key phrase as a question. Mirroring reduces defensiveness by 40% in under 60 seconds.",
         "Still irritated but present. Use the power of apology: take responsibility for something — even small — related to their frustration. Accountability deflates anger.",
         "Continued irritation-engagement mix. Ask: 'What's the most important thing I've missed about your position?' Positions them as expert, you as student.",
-    ],
-    ("angry", "high", "mid", "mid"): [
+    ),
+    ("angry", "high", "mid", "mid"): (
         "Agitation + attention still present — channel this energy. Ask a challenge question: 'What's the one thing that would change your mind?' Resistance hides high investment.",
         "Continued engagement under agitation. Name the strength behind their anger: 'The fact you feel this strongly shows how much you care about getting this right.'",
         "Sustained engaged-agitation. Give them a win: 'You're right about X — completely right. Given that, how do we move forward?' Partial agreement creates momentum.",
-    ],
+    ),
 
     # ── SAD ───────────────────────────────────────────────────────────────────
-    ("sad", "low", "low", "low"): [
+    ("sad", "low", "low", "low"): (
         "Withdrawal state — low energy, downward gaze. Activate reciprocity through vulnerability: share a relevant personal struggle BEFORE asking anything.",
         "Still withdrawn. Ask for their story: 'What happened that brought you to this point?' Listen for 2 full minutes without interjecting.",
         "Prolonged withdrawal. Introduce possibility slowly: 'If things were just 10% better — what would that look like?' Small future-pacing reopens possibility without pressure.",
-    ],
-    ("sad", "medium", "low", "low"): [
+    ),
+    ("sad", "medium", "low", "low"): (
         "Mild sadness with partial attention. Ask for their story: 'What happened that brought you to this point?' People in sadness bond through narrative.",
         "Continued sad-partial engagement. Deepen empathy: 'What's the hardest part of all of this for you?' The hardest part is where the real need lives.",
         "Sustained ambivalent-sad state. Use the miracle question: 'If you woke up tomorrow and the problem was gone — how would you know?' Bypasses resistance and activates motivation.",
-    ],
-    ("sad", "low", "mid", "low"): [
+    ),
+    ("sad", "low", "mid", "low"): (
         "Subdued affect signaling low confidence. Use Late Night FM DJ voice: slow, warm, measured. Reflect their emotion before any content: 'This clearly matters to you deeply.'",
         "Still subdued. Introduce possibility: 'What would need to change for this to feel different?' Asking about change implies change is possible — a powerful reframe.",
         "Prolonged subdued state. Ask about the best version of the situation: 'When has this worked well in the past?' Access to positive memory resources often shifts affect.",
-    ],
-    ("sad", "medium", "mid", "mid"): [
+    ),
+    ("sad", "medium", "mid", "mid"): (
         "Sadness + moderate engagement — ambivalence. Use contrast principle: paint the gap between where they are and where they could be. Emotion follows vision.",
         "Persistent sadness with partial engagement. Deepen empathy: 'What's the hardest part of all of this for you?' Then listen fully without adding content.",
         "Sustained ambivalent-sad state. Use the miracle question: 'If you woke up and the problem was solved — how would you know?' Activates motivation directly.",
-    ],
+    ),
 
     # ── DISGUSTED ─────────────────────────────────────────────────────────────
-    ("disgusted", "low", "mid", "low"): [
+    ("disgusted", "low", "mid", "low"): (
         "Value mismatch — micro-disgust + low attention. Pivot immediately: 'I sense that landed differently than intended — what part concerns you most?'",
         "Value mismatch persisting. Don't defend the previous frame. Ask what matters most to them and rebuild your position from their anchor point.",
         "Persistent value misalignment. Use inversion: present the OPPOSITE position and ask them to critique it. They'll often argue themselves into your actual position.",
-    ],
-    ("disgusted", "medium", "mid", "mid"): [
+    ),
+    ("disgusted", "medium", "mid", "mid"): (
         "Subtle rejection — framing isn't resonating. Framing reboot: present the same idea through a completely different lens — individual vs. team, process vs. results.",
         "Continued value friction. Use 'the third story': how would a neutral third party see this situation? Outside perspective breaks in-frame deadlocks.",
         "Sustained misalignment. Find ONE point of genuine agreement and anchor everything else to it. Agreement on any shared value creates a psychological bridge.",
-    ],
+    ),
 
     # ── CRISIS TACTICS (alert-driven, rotate through 3 approaches) ────────────
-    "__engagement_drop__": [
+    "__engagement_drop__": (
         "Engagement dropping fast. Pattern interrupt: ask their opinion directly, or call it out openly: 'I can see we've hit something — what's on your mind?'",
         "Engagement still falling. Abandon your current agenda. Ask: 'What would make this conversation worth your time?' Let their answer restructure everything.",
         "Engagement collapse continuing. Radical transparency: 'I feel like I've lost you somewhere — where did this stop working?' Meta-commentary often resets the conversation.",
-    ],
-    "__stress_spike__": [
+    ),
+    "__stress_spike__": (
         "Stress cascading across all signals. Drop to one sentence, slow your breathing visibly, then give them a choice: 'What feels right to you?' Agency dissolves stress.",
         "Stress still elevated. Remove all demands: 'We don't have to solve this today — what would feel manageable to discuss right now?'",
         "Sustained stress spike. Use the paradoxical injunction: 'Take as long as you need — there's no rush at all.' Removing time pressure often accelerates resolution.",
-    ],
-    "__inconsistency__": [
+    ),
+    "__inconsistency__": (
         "Mixed signals — smiling but stress rising. Leakage event. Deploy: 'What aren't we talking about that we should be?' Name the meta-level directly.",
         "Behavioral inconsistency persisting. Ask: 'Your body seems to be saying something your words aren't — what's the real concern here?'",
         "Continued signal contradiction. Try a soft confrontation: 'I notice you say X but I'm getting a different sense — am I reading that wrong?'",
-    ],
-    "__attention_lost__": [
+    ),
+    "__attention_lost__": (
         "Attention has left — gaze and posture confirm cognitive disengagement. Stop all content. Call their name once, ask: 'What's the most important thing you need from this conversation right now?' Hold 10 seconds of silence.",
         "Still disengaged. Full pattern interrupt: physically reposition, lower your voice to near-whisper, and say only: 'Let me start over.' Novelty and humility together reset attention.",
         "Prolonged disengagement. This conversation needs an exit and restart. Say: 'Let's pause — when would be a better time to continue this?' Graceful exits preserve future access.",
-    ],
+    ),
 }
 
+# Intern the key strings: identity-fast hashing/equality for the interned
+# lookup keys built in _psychology_fallback.
+def _intern_key(key: TacticKey) -> TacticKey:
+    if isinstance(key, str):
+        return sys.intern(key)
+    emotion, attention, s_zone, e_zone = key
+    return sys.intern(emotion), sys.intern(attention), sys.intern(s_zone), sys.intern(e_zone)
+
+
+TACTICS = {_intern_key(k): v for k, v in TACTICS.items()}
+_tactics_get = TACTICS.get  # bound once for _get_tactic
+
+# Sentinel keys (interned, from _intern_key) and their tactics, bound once so
+# the alert and trend steps rotate through them without a TACTICS probe.
+_ATTENTION_LOST, _ENGAGEMENT_DROP, _STRESS_SPIKE, _INCONSISTENCY = (
+    sys.intern(k)
+    for k in ("__attention_lost__", "__engagement_drop__", "__stress_spike__", "__inconsistency__")
+)
+_ATTENTION_LOST_TACTICS: tuple[str, ...] = TACTICS[_ATTENTION_LOST]
+_ENGAGEMENT_DROP_TACTICS: tuple[str, ...] = TACTICS[_ENGAGEMENT_DROP]
+_STRESS_SPIKE_TACTICS: tuple[str, ...] = TACTICS[_STRESS_SPIKE]
+_INCONSISTENCY_TACTICS: tuple[str, ...] = TACTICS[_INCONSISTENCY]
+
+# Flow window (high engagement, low stress, no matching tactic): one fixed
+# message, returned without a rotation step.
+_FLOW_STATE_MSG = (
+    "You're in the 'flow state' window — emotional safety and cognitive engagement "
+    "are both high. This is your highest-leverage moment. Make your most important "
+    "ask or deliver your key message NOW."
+)
+
 # Rotating fallback pool for purely stable baseline readings
-_default_pool = [
+_default_pool: tuple[str, ...] = (
     "Stable baseline — all signals calm. Deploy strategic silence: stop talking for 5 seconds and observe micro-reactions. Silence reveals resistance that speech hides.",
     "Neutral baseline. Use the 'summary label': restate their key position verbatim and ask '…is that right?' It triggers the 'That's right' trust response.",
     "Stable environment. Plant a calibrated question: 'What matters most to you in making this decision?' Then listen without interrupting for 90 seconds.",
@@ -393,90 +812,291 @@ _default_pool = [
     "Clean baseline. Use behavioral mirroring: match their posture, gesture frequency, and breathing pace. Synchrony increases trust by 32% and compliance by 26%.",
     "Signals stable. Deploy an I-statement: 'I'm trying to understand your perspective fully before forming my own.' Epistemic humility paradoxically builds authority.",
     "Sustained neutral. Ask a genuine curiosity question — something you actually don't know the answer to about their situation. Authentic curiosity is one of the rarest and most disarming interpersonal signals.",
-]
-_default_idx = [0]
+)
 
+# The active session's state, set per request task by use_rotation_state().
+# Callers that never set one share a process-wide state.
+_rotation: ContextVar[RotationState] = ContextVar(
+    "cognisync_rotation", default=RotationState()
+)
 
-def _psychology_fallback(current: dict, history: list, alerts: list) -> str:
-    """Deep psychology rule-based advice engine with per-state rotation."""
-    emotion = current.get("emotion", "neutral")
-    attention = current.get("attention", "medium")
-    stress = current.get("stress_score", 20.0)
-    engagement = current.get("engagement_score", 50.0)
 
-    s_zone = _zone(stress)
-    e_zone = _zone(engagement)
+def use_rotation_state(state: RotationState) -> None:
+    """Rotate fallback advice with `state` for the rest of the current task."""
+    _rotation.set(state)
+
+
+# Alert keyword classes, checked in priority order against all alerts at once
+_RE_ALERT_ATTENTION = re.compile(r"[Aa]ttention|[Dd]isengaged")
+_RE_ALERT_DROP = re.compile(r"Engagement dropping|Very low engagement")
+_RE_ALERT_STRESS = re.compile(r"stress", re.IGNORECASE)
+_RE_ALERT_INCONSISTENT = re.compile(r"Inconsistent")
+
+
+# Exact key then fuzzy fallbacks: preserve attention level first, then relax
+# one dimension at a time. None keeps the state's own value.
+_FUZZY_TEMPLATE = (
+    (None, None, None),
+    (None, _MID, None),
+    (None, None, _MID),
+    (None, _MID, _MID),
+    (_MEDIUM, None, None),
+    (_MEDIUM, _MID, None),
+    (_MEDIUM, _MID, _MID),
+)
+
+
+def _fuzzy_chain(emotion: str, attention: str, s_zone: str, e_zone: str) -> tuple[TacticKey, ...]:
+    return tuple(
+        (emotion, a or attention, s or s_zone, e or e_zone) for a, s, e in _FUZZY_TEMPLATE
+    )
+
+
+# Chains for every state of an emotion TACTICS knows about, built at import;
+# other emotions can't hit a tactic and get their chain built on demand.
+_FUZZY_CHAINS = {
+    (em, a, sz, ez): _fuzzy_chain(em, a, sz, ez)
+    for em in {k[0] for k in TACTICS if isinstance(k, tuple)}
+    for a in (_HIGH, _MEDIUM, _LOW)
+    for sz in _ZONE_NAMES
+    for ez in _ZONE_NAMES
+}
+
+
+@lru_cache(maxsize=1024)
+def _resolve_key(emotion: str, attention: str, s_zone: str, e_zone: str, e_bucket: str) -> Resolution:
+    """
+    Steps 3-5 of the fallback for a state, minus the rotation.
+    Returns (last key looked up, trailing run of that key, whether that run is
+    every lookup, outcome): outcome is _OUT_TACTIC when the key is in TACTICS,
+    else _OUT_FLOW or _OUT_DEFAULT. Label arguments must be interned. Rotation replays the lookups via _get_tactic.
+    """
+    lookups: list[TacticKey]
+    # ── 3. Hard overrides before TACTICS lookup ───────────────────────────────
+    if attention is _LOW:
+        key = (emotion, _LOW, s_zone, e_zone)
+        # Fallback for low-attention states not in dict
+        lookups = [key] if key in TACTICS else [key, _ATTENTION_LOST]
+    elif s_zone is _HIGH:
+        key = (emotion, attention, _HIGH, e_zone)
+        lookups = [key] if key in TACTICS else [key, _STRESS_SPIKE]
+    elif e_bucket is _LOW:
+        lookups = [_ENGAGEMENT_DROP]
+    else:
+        # ── 4. Exact TACTICS lookup then fuzzy match ──────────────────────────
+        state = (emotion, attention, s_zone, e_zone)
+        chain = _FUZZY_CHAINS.get(state) or _fuzzy_chain(*state)
+        lookups = []
+        for candidate in chain:
+            lookups.append(candidate)
+            if candidate in TACTICS:
+                break
+
+    last = lookups[-1]
+    run = 1
+    while run < len(lookups) and lookups[-run - 1] == last:
+        run += 1
+    if last in TACTICS:
+        outcome = _OUT_TACTIC
+    elif e_bucket is _FLOW and s_zone is _LOW:
+        # ── 5. Optimal state shortcut (engagement > 70 and stress < 35) ───────
+        outcome = _OUT_FLOW
+    else:
+        outcome = _OUT_DEFAULT
+    return last, run, run == len(lookups), outcome
+
+
+# Steps 3-5 flattened: _resolve_key evaluated for every state of the known
+# emotions at import, so a frame costs one tuple index. Unknown emotions fall
+# back to the memoized resolver.
+#
+# States pack into one small int:
+# code = (((emotion*3 + attention)*3 + s_zone)*3 + e_zone)*3 + e_bucket.
+# The stress bucket is s_zone itself (stress > 65 is "high"), so it takes no
+# digit of its own. Every code below len(_EMOTION_CODES) * 81 is a state, so
+# the table is dense and the code indexes it directly: no hashing, no probe.
+_E_BUCKETS = (_LOW, _MID, _FLOW)
+_EMOTION_CODES = {e: i for i, e in enumerate(sorted({s[0] for s in _FUZZY_CHAINS}))}
+_ATTENTION_CODES = {name: Attention(i) for i, name in enumerate(_ATTENTION_NAMES)}
+_resolved_by_code = {
+    (((_EMOTION_CODES[e] * 3 + _ATTENTION_CODES[a]) * 3
+      + _ZONE_NAMES.index(sz)) * 3 + _ZONE_NAMES.index(ez)) * 3 + bi:
+        _resolve_key.__wrapped__(e, a, sz, ez, eb)
+    for e, a, sz, ez in _FUZZY_CHAINS
+    for bi, eb in enumerate(_E_BUCKETS)
+}
+_DECISION_TABLE: tuple[Resolution, ...] = tuple(
+    _resolved_by_code[code] for code in range(len(_EMOTION_CODES) * 81)
+)
+del _resolved_by_code
+
+# Same table as an object array for select_tactics_batch's fancy index.
+_DECISION_ARR: np.ndarray = np.empty(len(_DECISION_TABLE), dtype=object)
+for _code, _res in enumerate(_DECISION_TABLE):
+    _DECISION_ARR[_code] = _res
+del _code, _res
+
+
+@dataclass(slots=True, frozen=True)
+class FallbackState:
+    """
+    A frame reduced to the fallback's categorical inputs (see select_tactic).
+    An attention label other than high/medium/low is kept as the raw string:
+    the overrides and fuzzy chain resolve it as is, not as a bucket.
+    """
+
+    emotion: str
+    attention: Attention | str
+    s_zone: Zone
+    e_zone: Zone
+    e_bucket: EngagementBucket
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "emotion", sys.intern(self.emotion))
+        if isinstance(self.attention, str):
+            object.__setattr__(self, "attention", sys.intern(self.attention))
+
+    @classmethod
+    def from_frame(cls, current: dict) -> "FallbackState":
+        s_i, z_i, b_i = _frame_buckets(current)
+        attention: str = current.get("attention", "medium")
+        return cls(
+            current.get("emotion", "neutral"),
+            _ATTENTION_CODES.get(attention, attention),
+            Zone(s_i),
+            Zone(z_i),
+            EngagementBucket(b_i),
+        )
+
+    @property
+    def code(self) -> int | None:
+        """_DECISION_TABLE index, or None for labels TACTICS doesn't know."""
+        e_code = _EMOTION_CODES.get(self.emotion)
+        if e_code is None or not isinstance(self.attention, Attention):
+            return None
+        return (((e_code * 3 + self.attention) * 3 + self.s_zone) * 3 + self.e_zone) * 3 + self.e_bucket
+
+
+def select_tactic(state: FallbackState) -> str:
+    """Fallback steps 3-6 (no alert or history trend checks) for a prebuilt state."""
+    code = state.code
+    if code is None:
+        attention = state.attention
+        res = _resolve_key(
+            state.emotion,
+            _ATTENTION_NAMES[attention] if isinstance(attention, Attention) else attention,
+            _ZONE_NAMES[state.s_zone], _ZONE_NAMES[state.e_zone], _E_BUCKETS[state.e_bucket],
+        )
+    else:
+        res = _DECISION_TABLE[code]
+    return _apply_resolution(*res)
+
+
+def _frame_buckets(current: dict) -> tuple[int, int, int]:
+    """The frame's precomputed buckets, or bucketize() them if it has none."""
+    buckets = current.get("buckets")
+    if buckets is None:
+        return bucketize(
+            current.get("stress_score", 20.0), current.get("engagement_score", 50.0)
+        )
+    return buckets
+
+
+def _psychology_fallback(current: dict, history: list[dict], alerts: list[str]) -> str:
+    """Deep psychology rule-based advice engine with per-state rotation."""
+    emotion = sys.intern(current.get("emotion", "neutral"))
+    attention = sys.intern(current.get("attention", "medium"))
+    stress: float = current.get("stress_score", 20.0)
+    engagement: float = current.get("engagement_score", 50.0)
 
     # ── 1. Alert-based tactics (highest priority) ─────────────────────────────
     if alerts:
-        if any(kw in a for a in alerts for kw in ("Attention", "attention", "disengaged", "Disengaged")):
-            return _get_tactic("__attention_lost__")
-        if any("Engagement dropping" in a or "Very low engagement" in a for a in alerts):
-            return _get_tactic("__engagement_drop__")
-        if any("Stress" in a or "stress" in a.lower() for a in alerts):
-            return _get_tactic("__stress_spike__")
-        if any("Inconsistent" in a for a in alerts):
-            return _get_tactic("__inconsistency__")
+        joined = "\n".join(alerts)
+        if _RE_ALERT_ATTENTION.search(joined):
+            return _rotate(_ATTENTION_LOST, _ATTENTION_LOST_TACTICS)
+        if _RE_ALERT_DROP.search(joined):
+            return _rotate(_ENGAGEMENT_DROP, _ENGAGEMENT_DROP_TACTICS)
+        if _RE_ALERT_STRESS.search(joined):
+            return _rotate(_STRESS_SPIKE, _STRESS_SPIKE_TACTICS)
+        if _RE_ALERT_INCONSISTENT.search(joined):
+            return _rotate(_INCONSISTENCY, _INCONSISTENCY_TACTICS)
 
     # ── 2. Cross-state trend detection ───────────────────────────────────────
     if len(history) >= 3:
         eng_trend = engagement - history[-3].get("engagement_score", engagement)
         stress_trend = stress - history[-3].get("stress_score", stress)
         if eng_trend < -15:
-            return _get_tactic("__engagement_drop__")
+            return _rotate(_ENGAGEMENT_DROP, _ENGAGEMENT_DROP_TACTICS)
         if stress_trend > 15:
-            return _get_tactic("__stress_spike__")
+            return _rotate(_STRESS_SPIKE, _STRESS_SPIKE_TACTICS)
         emotions = [h.get("emotion", "neutral") for h in history[-3:]] + [emotion]
         if len(set(emotions)) >= 3:
-            return _get_tactic("__inconsistency__")
+            return _rotate(_INCONSISTENCY, _INCONSISTENCY_TACTICS)
 
-    # ── 3. Hard overrides before TACTICS lookup ───────────────────────────────
-    if attention == "low":
-        key = (emotion, "low", s_zone, e_zone)
-        result = _get_tactic(key)
-        if result:
-            return result
-        # Fallback for low-attention states not in dict
-        return _get_tactic("__attention_lost__")
-
-    if stress > 65:
-        key = (emotion, attention, "high", e_zone)
-        result = _get_tactic(key)
-        if result:
-            return result
-        return _get_tactic("__stress_spike__")
-
-    if engagement < 30:
-        return _get_tactic("__engagement_drop__")
-
-    # ── 4. Exact TACTICS lookup then fuzzy match ──────────────────────────────
-    key = (emotion, attention, s_zone, e_zone)
-    result = _get_tactic(key)
-    if result:
+    # ── 3-5. State lookup (pure, memoized) ────────────────────────────────────
+    # Scores arrive quantized (see bucketize): stress > 65 is exactly s_zone
+    # "high", and the cascade only tests engagement against its bucket.
+    s_i, z_i, b_i = _frame_buckets(current)
+    e_code = _EMOTION_CODES.get(emotion)
+    a_code = _ATTENTION_CODES.get(attention)
+    if e_code is None or a_code is None:
+        key, run, whole, outcome = _resolve_key(
+            emotion, attention, _ZONE_NAMES[s_i], _ZONE_NAMES[z_i], _E_BUCKETS[b_i]
+        )
+    else:
+        key, run, whole, outcome = _DECISION_TABLE[
+            (((e_code * 3 + a_code) * 3 + s_i) * 3 + z_i) * 3 + b_i
+        ]
+
+    # Fast path, the common case: the first key looked up (exact state or the
+    # override's key) is a tactic — a single rotation step.
+    if whole and outcome is _OUT_TACTIC:
+        return _rotate(key, TACTICS[key])
+
+    return _apply_resolution(key, run, whole, outcome)
+
+
+def _apply_resolution(key: TacticKey, run: int, whole: bool, outcome: str) -> str:
+    """Advance rotation for a resolved state and render its advice."""
+    result = _get_tactic(key, run, whole)
+    if result is not None:  # outcome is _OUT_TACTIC
         return result
 
-    # Fuzzy: preserve attention level first, then relax one dimension at a time
-    for fuzzy_key in [
-        (emotion, attention, "mid", e_zone),
-        (emotion, attention, s_zone, "mid"),
-        (emotion, attention, "mid", "mid"),
-        (emotion, "medium", s_zone, e_zone),
-        (emotion, "medium", "mid", e_zone),
-        (emotion, "medium", "mid", "mid"),
-    ]:
-        result = _get_tactic(fuzzy_key)
-        if result:
-            return result
-
-    # ── 5. Optimal state shortcut ─────────────────────────────────────────────
-    if engagement > 70 and stress < 35:
-        return (
-            "You're in the 'flow state' window — emotional safety and cognitive engagement "
-            "are both high. This is your highest-leverage moment. Make your most important "
-            "ask or deliver your key message NOW."
-        )
+    if outcome is _OUT_FLOW:
+        return _FLOW_STATE_MSG
 
     # ── 6. Rotating default ───────────────────────────────────────────────────
-    idx = _default_idx[0] % len(_default_pool)
-    _default_idx[0] += 1
-    return _default_pool[idx]
+    return next(_rotation.get().default_cycle)
+
+
+def select_tactics_batch(
+    emotions: Sequence[str],
+    attentions: Sequence[str],
+    stress: Sequence[float] | np.ndarray,
+    engagement: Sequence[float] | np.ndarray,
+) -> list[str]:
+    """
+    Fallback advice for many frames at once (state lookup only: no alerts or
+    history trend). Zones, buckets and table codes are computed as whole-array
+    ops and resolved with one fancy index; rotation is order-dependent, so it
+    still advances frame by frame exactly as _psychology_fallback would.
+    """
+    s_arr = np.asarray(stress, dtype=float)
+    e_arr = np.asarray(engagement, dtype=float)
+    n = len(s_arr)
+    s_idx = np.digitize(s_arr, _ZONE_THRESH)  # == bisect_right per element
+    z_idx = np.digitize(e_arr, _ZONE_THRESH)
+    b_idx = np.where(e_arr < 30, 0, np.where(e_arr > 70, 2, 1))
+    em = np.fromiter((_EMOTION_CODES.get(e, -1) for e in emotions), np.int64, n)
+    at = np.fromiter((_ATTENTION_CODES.get(a, -1) for a in attentions), np.int64, n)
+
+    known = (em >= 0) & (at >= 0)
+    codes = (((em * 3 + at) * 3 + s_idx) * 3 + z_idx) * 3 + b_idx
+    resolved: np.ndarray = _DECISION_ARR[np.where(known, codes, 0)]
+
+    for i in np.flatnonzero(~known).tolist():  # emotions outside the table
+        resolved[i] = _resolve_key(
+            sys.intern(str(emotions[i])), sys.intern(str(attentions[i])),
+            _ZONE_NAMES[int(s_idx[i])], _ZONE_NAMES[int(z_idx[i])], _E_BUCKETS[int(b_idx[i])],
+        )
+    return [_apply_resolution(*res) for res in resolved]
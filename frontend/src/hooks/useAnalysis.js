@@ -13,6 +13,8 @@ export function useAnalysis({ onResult, onError, intervalMs = 1000 }) {
     const audioContextRef = useRef(null)
     const analyserRef = useRef(null)
     const audioStreamRef = useRef(null)
+    // Stable per-tab id so the backend keeps tracker state across our frames
+    const sessionIdRef = useRef(crypto.randomUUID())
 
     // Backend URL: uses VITE_API_URL env var in production, empty string uses Vite proxy in dev
     const BACKEND_URL = import.meta.env.VITE_API_URL || ''
@@ -98,23 +100,24 @@ export function useAnalysis({ onResult, onError, intervalMs = 1000 }) {
         canvas.height = h
         ctx.drawImage(video, 0, 0, w, h)
 
-        const dataUrl = canvas.toDataURL('image/jpeg', 0.7)
-        const base64 = dataUrl.split(',')[1]
-        if (!base64) {
-            console.warn('[CogniSync] empty base64 from canvas')
+        const blob = await new Promise((resolve) => canvas.toBlob(resolve, 'image/jpeg', 0.7))
+        if (!blob) {
+            console.warn('[CogniSync] empty JPEG blob from canvas')
             return
         }
 
         const audioFeatures = getAudioFeatures()
 
+        // Raw multipart upload: no base64 inflation on the wire or decode on the server
+        const form = new FormData()
+        form.append('frame', blob, 'frame.jpg')
+        if (audioFeatures) form.append('audio_features', JSON.stringify(audioFeatures))
+
         try {
-            const response = await fetch(`${BACKEND_URL}/analyze`, {
+            const response = await fetch(`${BACKEND_URL}/analyze_raw`, {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    frame_base64: base64,
-                    audio_features: audioFeatures,
-                }),
+                headers: { 'X-Session-Id': sessionIdRef.current },
+                body: form,
                 signal: AbortSignal.timeout(8000),
             })
             if (!response.ok) throw new Error(`HTTP ${response.status}`)